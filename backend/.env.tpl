@@ -7,4 +7,36 @@ POSTGRES_USER=postgres
 POSTGRES_PASSWORD=password
 POSTGRES_DB=products_db
 ADMIN_USERNAME=admin
-ADMIN_PASSWORD=admin_password_here
\ No newline at end of file
+ADMIN_PASSWORD=admin_password_here
+DB_POOL_SIZE=5
+DB_MAX_OVERFLOW=10
+DB_POOL_RECYCLE=1800
+DB_POOL_PRE_PING=true
+DB_POOL_TIMEOUT=30
+DATABASE_REPLICA_URLS=[]
+REPLICA_HEALTH_CHECK_INTERVAL=5
+REPLICA_HEALTH_CHECK_TIMEOUT=2
+REPLICA_MAX_LAG_SECONDS=10
+READ_YOUR_WRITES_SECONDS=5
+LOCAL_CACHE_MAX_ENTRIES=1024
+LOCAL_CACHE_TTL=30
+PRODUCT_LIST_CACHE_TTL=60
+PRODUCT_LIST_STALE_TTL=300
+CACHE_LOCK_TIMEOUT_MS=10000
+CACHE_LOCK_WAIT_MS=3000
+CACHE_LOCK_POLL_MS=50
+PASSWORD_HASH_WORKERS=2
+PASSWORD_HASH_MAX_PENDING=32
+PASSWORD_HASH_QUEUE_TIMEOUT=5
+RATE_LIMIT_ENABLED=true
+RATE_LIMITS={}
+PRODUCT_BATCH_MAX_SIZE=5000
+MAX_IMAGE_UPLOAD_BYTES=5242880
+IMAGE_WORKERS=1
+IMAGE_RELEASE_MIN_AGE=600
+SLOW_QUERY_THRESHOLD_MS=200
+SLOW_QUERY_LOG_PARAMS=false
+SLOW_QUERY_MAX_PARAMS_LENGTH=500
+PROFILING_ENABLED=true
+PROFILE_MAX_ROWS=50
+METRICS_TOKEN=
\ No newline at end of file
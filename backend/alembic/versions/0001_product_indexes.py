@@ -0,0 +1,51 @@
+"""product pagination, search and filter indexes
+
+Brings databases created by create_all before these indexes existed up to
+date. Every step is idempotent, so it is safe on fresh databases too.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+from app.db.models import SQLITE_PRODUCT_FTS
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_products_created_at_id", "products", ["created_at", "id"], if_not_exists=True)
+    op.create_index("ix_products_price_id", "products", ["price", "id"], if_not_exists=True)
+    op.create_index("ix_products_category_price", "products", ["category", "price"], if_not_exists=True)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in ("name", "description"):
+            op.create_index(
+                f"ix_products_{column}_trgm", "products", [column], if_not_exists=True,
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+            )
+    elif dialect == "sqlite":
+        for statement in SQLITE_PRODUCT_FTS:
+            op.execute(statement)
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_products_description_trgm", "products", if_exists=True)
+        op.drop_index("ix_products_name_trgm", "products", if_exists=True)
+    elif dialect == "sqlite":
+        for trigger in ("products_fts_insert", "products_fts_delete", "products_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
+
+    op.drop_index("ix_products_category_price", "products", if_exists=True)
+    op.drop_index("ix_products_price_id", "products", if_exists=True)
+    op.drop_index("ix_products_created_at_id", "products", if_exists=True)
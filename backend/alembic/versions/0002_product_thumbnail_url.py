@@ -0,0 +1,25 @@
+"""product thumbnail url
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all already adds the column on fresh databases
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("products")}
+    if "thumbnail_url" not in columns:
+        op.add_column("products", sa.Column("thumbnail_url", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("products", "thumbnail_url")
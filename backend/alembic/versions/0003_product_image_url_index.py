@@ -0,0 +1,21 @@
+"""product image url index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_products_image_url", "products", ["image_url"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index("ix_products_image_url", table_name="products", if_exists=True)
@@ -0,0 +1,46 @@
+"""favorites composite primary key
+
+Databases created before the key existed may hold duplicate or half-empty
+rows, so the table is rebuilt from its distinct pairs rather than altered.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not sa.inspect(bind).get_pk_constraint("user_favorite_products").get("constrained_columns"):
+        op.create_table(
+            "user_favorite_products_new",
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("product_id", sa.String(), sa.ForeignKey("products.id"), primary_key=True),
+        )
+        op.execute(
+            "INSERT INTO user_favorite_products_new (user_id, product_id) "
+            "SELECT DISTINCT user_id, product_id FROM user_favorite_products "
+            "WHERE user_id IS NOT NULL AND product_id IS NOT NULL"
+        )
+        op.drop_table("user_favorite_products")
+        op.rename_table("user_favorite_products_new", "user_favorite_products")
+        if bind.dialect.name == "postgresql":
+            op.execute(
+                "ALTER TABLE user_favorite_products "
+                "RENAME CONSTRAINT user_favorite_products_new_pkey TO user_favorite_products_pkey"
+            )
+    op.create_index(
+        "ix_user_favorite_products_product_id", "user_favorite_products", ["product_id"], if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index("ix_user_favorite_products_product_id", table_name="user_favorite_products", if_exists=True)
@@ -0,0 +1,46 @@
+"""product facet counts
+
+Counts per (category, price bucket), filled here from the existing products and
+maintained incrementally by the product write paths from then on. The bucket
+width matches PRICE_BUCKET_WIDTH at the time of this revision.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+PRICE_BUCKET_WIDTH = 10
+
+
+def upgrade():
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("product_facets"):
+        return
+    op.create_table(
+        "product_facets",
+        sa.Column("category", sa.String(), primary_key=True),
+        sa.Column("price_bucket", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    # Prices are never negative, so truncation equals floor on SQLite
+    bucket = (
+        f"FLOOR(price / {PRICE_BUCKET_WIDTH})" if bind.dialect.name == "postgresql"
+        else f"CAST(price / {PRICE_BUCKET_WIDTH} AS INTEGER)"
+    )
+    op.execute(
+        f"INSERT INTO product_facets (category, price_bucket, count) "
+        f"SELECT category, {bucket}, COUNT(*) FROM products "
+        f"WHERE category IS NOT NULL AND price IS NOT NULL GROUP BY category, {bucket}"
+    )
+
+
+def downgrade():
+    op.drop_table("product_facets")
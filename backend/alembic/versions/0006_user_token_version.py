@@ -0,0 +1,29 @@
+"""user token version
+
+Moves the token version from a Redis-only counter onto the users row, so a
+flushed or evicted cache can no longer revive revoked role claims. Tokens
+issued before this revision carry no "tv" claim and are always checked
+against the database.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+    if "token_version" not in columns:
+        op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("users", "token_version")
@@ -1,6 +1,9 @@
 from fastapi import APIRouter
-from app.api.endpoints import auth, products
+from app.api.endpoints import auth, products, product_batch, internal
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-api_router.include_router(products.router, prefix="/products", tags=["Products"])
\ No newline at end of file
+# Batch routes first so /products/batch is not captured by /products/{product_id}
+api_router.include_router(product_batch.router, prefix="/products", tags=["Products"])
+api_router.include_router(products.router, prefix="/products", tags=["Products"])
+api_router.include_router(internal.router, prefix="/internal", tags=["Internal"], include_in_schema=False)
\ No newline at end of file
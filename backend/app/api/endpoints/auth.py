@@ -1,22 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from app.schemas.user import UserCreate, Token, UserLogin
-from app.core.security import create_access_token, verify_password, get_password_hash
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.user import UserCreate, Token, UserLogin, Principal, RoleUpdate
+from app.core.security import verify_password_async, get_password_hash_async
+from app.api.utils.utils import issue_access_token, get_current_principal, admin_required, invalidate_principal
+from app.core.exceptions import AppException
 from app.db.base import get_session_local
 from app.db.models import User
-from app.core.config import limiter
+from app.core.rate_limit import rate_limit
 from app.core.security import get_uuid4
 router = APIRouter()
 
-@router.post("/register", response_model=Token)
-@limiter.limit("5/minute")
-async def register(request: Request, user: UserCreate, db: Session = Depends(get_session_local)):
-    user_obj = db.query(User).filter(User.username == user.username).first()
+@router.post("/register", response_model=Token, dependencies=[Depends(rate_limit("auth.register", "5/minute"))])
+async def register(user: UserCreate, db: AsyncSession = Depends(get_session_local)):
+    result = await db.execute(select(User).where(User.username == user.username))
+    user_obj = result.scalars().first()
     
     if user_obj:
         raise HTTPException(status_code=400, detail="Username already taken")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     
     new_user = User(
         id=get_uuid4(),username=user.username, hashed_password=hashed_password
@@ -24,22 +27,44 @@ async def register(request: Request, user: UserCreate, db: Session = Depends(get
     
     db.add(new_user)
     
-    db.commit()
+    await db.commit()
     
-    access_token = create_access_token(data={"sub": new_user.username})
+    access_token = await issue_access_token(new_user)
     
     return {"access_token": access_token,"role":new_user.role}
 
 
-@router.post("/login", response_model=Token)
-@limiter.limit("5/minute")
-async def login(request: Request, user: UserLogin, db: Session = Depends(get_session_local)):
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit("auth.login", "5/minute"))])
+async def login(user: UserLogin, db: AsyncSession = Depends(get_session_local)):
     
-    db_user = db.query(User).filter(User.username == user.username).first()
+    result = await db.execute(select(User).where(User.username == user.username))
+    db_user = result.scalars().first()
     
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid username or password")
     
-    access_token = create_access_token(data={"sub": db_user.username})
+    access_token = await issue_access_token(db_user)
     
-    return {"access_token": access_token,"role":db_user.role}
\ No newline at end of file
+    return {"access_token": access_token,"role":db_user.role}
+
+
+@router.put("/users/{user_id}/role")
+async def update_user_role(
+    user_id: str,
+    role_update: RoleUpdate,
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
+):
+    admin_required(principal)
+
+    db_user = await db.get(User, user_id)
+    if not db_user:
+        raise AppException(name="Not Found", detail="User not found")
+
+    db_user.role = role_update.role
+    db_user.token_version = User.token_version + 1
+    await db.commit()
+    await db.refresh(db_user)
+    await invalidate_principal(db_user)
+
+    return {"detail": "Role updated successfully"}
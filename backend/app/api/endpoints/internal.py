@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from app.db.base import get_pool_stats
+from app.core.cache import get_cache_stats
+from app.core.security import get_hashing_stats
+from app.api.utils.utils import admin_required, get_current_principal
+from app.schemas.user import Principal
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+async def db_pool_stats(
+    principal: Principal = Depends(get_current_principal)
+):
+    admin_required(principal)
+    return get_pool_stats()
+
+
+@router.get("/cache")
+async def cache_stats(
+    principal: Principal = Depends(get_current_principal)
+):
+    admin_required(principal)
+    return get_cache_stats()
+
+
+@router.get("/hashing")
+async def hashing_stats(
+    principal: Principal = Depends(get_current_principal)
+):
+    admin_required(principal)
+    return get_hashing_stats()
@@ -0,0 +1,149 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Literal, Optional
+from app.schemas.product import ProductCreate, ProductBatchUpdate, ProductBatchResult, ProductImportResult
+from app.schemas.user import Principal
+from app.db.base import get_session_local
+from app.db.models import Product, user_favorite_products
+from app.core.exceptions import AppException
+from app.api.utils.catalog_io import FORMATS, import_products, export_products
+from app.api.utils.images import release_images
+from app.api.utils.facets import apply_facet_changes
+from app.api.utils.utils import admin_required, get_current_principal, invalidate_product_list_cache, validate_batch_items, check_batch_size, insert_new_products
+
+router = APIRouter()
+
+# Items are validated one by one so a bad row is reported instead of failing the whole batch.
+# Valid rows are written in a single transaction and the product list cache is invalidated once.
+
+@router.post("/batch", response_model=ProductBatchResult)
+async def create_products_batch(
+    items: List[Dict[str, Any]] = Body(...),
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
+):
+    try:
+        admin_required(principal)
+        products, errors = validate_batch_items(items, ProductCreate)
+
+        ids, insert_errors = await insert_new_products(db, products)
+        if ids:
+            await db.commit()
+            await invalidate_product_list_cache()
+        return {"succeeded": ids, "errors": sorted(errors + insert_errors, key=lambda e: e["index"])}
+    except (AppException, HTTPException) as e:
+        raise e
+    except Exception as e:
+        raise AppException(name="Batch Creation Error", detail=str(e))
+
+@router.put("/batch", response_model=ProductBatchResult)
+async def update_products_batch(
+    items: List[Dict[str, Any]] = Body(...),
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
+):
+    try:
+        admin_required(principal)
+        products, errors = validate_batch_items(items, ProductBatchUpdate)
+
+        ids = [product.id for _, product in products]
+        result = await db.execute(
+            select(Product.id, Product.image_url, Product.category, Product.price).where(Product.id.in_(ids))
+        )
+        current = {row.id: row for row in result.all()}
+
+        rows = []
+        for index, product in products:
+            if product.id not in current:
+                errors.append({"index": index, "id": product.id, "detail": "Product not found"})
+                continue
+            # Omitted fields, image_url included, keep their current value
+            row = product.dict(exclude_unset=True)
+            if "image_url" in row and row["image_url"] != current[product.id].image_url:
+                row["thumbnail_url"] = None
+            rows.append(row)
+
+        if rows:
+            # Bulk UPDATE by primary key: one executemany per set of columns sent
+            await db.execute(update(Product), rows)
+            # An id listed twice ends up with its last row's values
+            final = {row["id"]: row for row in rows}
+            await apply_facet_changes(
+                db,
+                added=[(row["category"], row["price"]) for row in final.values()],
+                removed=[(current[product_id].category, current[product_id].price) for product_id in final],
+            )
+            await db.commit()
+            await release_images(db, [current[row["id"]].image_url for row in rows if "thumbnail_url" in row])
+            await invalidate_product_list_cache()
+        return {"succeeded": [row["id"] for row in rows], "errors": sorted(errors, key=lambda e: e["index"])}
+    except (AppException, HTTPException) as e:
+        raise e
+    except Exception as e:
+        raise AppException(name="Batch Update Error", detail=str(e))
+
+@router.delete("/batch", response_model=ProductBatchResult)
+async def delete_products_batch(
+    ids: List[str] = Body(...),
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
+):
+    try:
+        admin_required(principal)
+        check_batch_size(ids)
+
+        result = await db.execute(
+            select(Product.id, Product.image_url, Product.category, Product.price).where(Product.id.in_(ids))
+        )
+        current = {row.id: row for row in result.all()}
+        existing = set(current)
+        errors = [
+            {"index": index, "id": product_id, "detail": "Product not found"}
+            for index, product_id in enumerate(ids) if product_id not in existing
+        ]
+
+        if existing:
+            await db.execute(
+                delete(user_favorite_products).where(user_favorite_products.c.product_id.in_(existing))
+            )
+            await db.execute(delete(Product).where(Product.id.in_(existing)))
+            await apply_facet_changes(db, removed=[(row.category, row.price) for row in current.values()])
+            await db.commit()
+            await release_images(db, [row.image_url for row in current.values()])
+            await invalidate_product_list_cache()
+        return {"succeeded": [product_id for product_id in ids if product_id in existing], "errors": errors}
+    except (AppException, HTTPException) as e:
+        raise e
+    except Exception as e:
+        raise AppException(name="Batch Deletion Error", detail=str(e))
+
+@router.post("/import", response_model=ProductImportResult)
+async def import_products_stream(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    principal: Principal = Depends(get_current_principal)
+):
+    """Import a CSV (with a header row) or NDJSON body, read incrementally from the request stream."""
+    try:
+        admin_required(principal)
+        if format is None:
+            format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+        return await import_products(request.stream(), format)
+    except (AppException, HTTPException) as e:
+        raise e
+    except Exception as e:
+        raise AppException(name="Product Import Error", detail=str(e))
+
+@router.get("/export")
+async def export_products_stream(
+    format: Literal["csv", "ndjson"] = "ndjson",
+    principal: Principal = Depends(get_current_principal)
+):
+    admin_required(principal)
+    return StreamingResponse(
+        export_products(format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
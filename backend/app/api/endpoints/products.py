@@ -1,20 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductWithFavoriteResponse
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductWithFavoriteResponse, ProductCursorPage, ProductFacets
 from app.db.base import get_session_local
-from app.db.models import Product, User
-from app.core.cache import redis_client
-from app.core.security import verify_token
+from app.db.models import Product
+from app.schemas.user import Principal
 from app.core.exceptions import AppException
 import uuid
-from typing import Optional, List
-from app.api.utils.utils import get_user,build_product_query,delete_redis_cache,get_redis_cache,set_redis_cache,admin_required
-from app.core.constants import PRODUCT_LIST_INDEX,UPLOAD_DIR
+from typing import Optional, Literal
+from app.api.utils.utils import get_current_principal,get_read_session,build_product_query,get_redis_cache,set_redis_cache,get_cached_page,admin_required,get_product_list_cache_key,invalidate_product_list_cache,invalidate_favorites_cache,product_page_response,product_exists,add_favorite_product,remove_favorite_product,get_favorites_page_cache_key,json_page_response
+from app.api.utils.pagination import paginate_by_cursor, paginate_favorites, paginate_product_rows, parse_product_fields
+from app.core.constants import UPLOAD_DIR, IMAGE_CONTENT_TYPES
+from app.core.images import image_files, image_variant_names
+from app.api.utils.images import ImageUploadRoute, store_image_upload, release_images
+from app.api.utils.facets import apply_facet_changes, get_product_facets
 from fastapi import UploadFile, File, HTTPException
-import shutil
-from fastapi.responses import FileResponse
 
 router = APIRouter()
 
@@ -22,22 +23,23 @@ router = APIRouter()
 async def create_product(
     request: Request,
     product: ProductCreate, 
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token)
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
 ):
     try:
-        user = admin_required(username, db)
+        admin_required(principal)
     
-        existing_product = db.query(Product).filter(Product.name == product.name).first()
+        result = await db.execute(select(Product).where(Product.name == product.name))
+        existing_product = result.scalars().first()
         if existing_product:
             raise AppException(name="Product Creation Error", detail="A product with the same name already exists.")
         
         new_product = Product(**product.dict(), id=str(uuid.uuid4()))
         db.add(new_product)
-        db.commit()
-        db.refresh(new_product)
-        cache_key = f"{PRODUCT_LIST_INDEX}:{username}:*"
-        await delete_redis_cache(cache_key)
+        await apply_facet_changes(db, added=[(product.category, product.price)])
+        await db.commit()
+        await db.refresh(new_product)
+        await invalidate_product_list_cache()
         return new_product
     except AppException as e:
         raise e
@@ -47,64 +49,125 @@ async def create_product(
 @router.get("/", response_model=Page[ProductWithFavoriteResponse])
 async def get_products(
     request: Request,
-    page: int = 1, 
-    size: int = 10,
+    page: int = Query(1, ge=1), 
+    size: int = Query(10, ge=1, le=100),
     name: Optional[str] = None,
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token)
+    search: Optional[str] = Query(None, description="Ranked search over name and description; typo-tolerant on PostgreSQL, substring-only on SQLite"),
+    fields: Optional[str] = Query(None, description="Comma-separated item fields to return; id and is_favorite are always included"),
+    db: AsyncSession = Depends(get_read_session),
+    principal: Principal = Depends(get_current_principal)
 ):
     try:
-        user = get_user(username, db)
+        item_fields = parse_product_fields(fields)
+        cache_key = await get_product_list_cache_key(
+            page, size, name, category, min_price, max_price, search, ",".join(item_fields)
+        )
 
-        cache_key = f"{PRODUCT_LIST_INDEX}:{username}:{page}:{size}:{name}:{category}:{min_price}:{max_price}" 
-        
-        cached_data = await get_redis_cache(cache_key)
-        if cached_data:
-            return Page.parse_raw(cached_data)
-        
-        
-        products_query = build_product_query(db, name, category, min_price, max_price)
-        
-        result = paginate(products_query)
-        
-        favorite_products = {p.id for p in user.favorite_products}
-        
-        
-        for item in result.items:
-            item.is_favorite = item.id in favorite_products
-        
-        await set_redis_cache(cache_key,result.json())
+        async def load_page(read_db: AsyncSession) -> str:
+            products_query = build_product_query(name, category, min_price, max_price, search)
+            return await paginate_product_rows(read_db, products_query, page, size, item_fields)
+
+        page_json = await get_cached_page(cache_key, load_page)
 
-        return result
+        return await product_page_response(request, principal, db, page_json)
     except AppException as e:
         raise e
     except Exception as e:
         raise AppException(name="Product Retrieval Error", detail=str(e))
 
+@router.get("/cursor", response_model=ProductCursorPage)
+async def get_products_by_cursor(
+    request: Request,
+    cursor: Optional[str] = None,
+    size: int = Query(10, ge=1, le=100),
+    order_by: Literal["created_at", "price"] = "created_at",
+    descending: bool = False,
+    name: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    db: AsyncSession = Depends(get_read_session),
+    principal: Principal = Depends(get_current_principal)
+):
+    try:
+        cache_key = await get_product_list_cache_key(
+            "cursor", cursor, size, order_by, descending, name, category, min_price, max_price
+        )
+
+        async def load_page(read_db: AsyncSession) -> str:
+            products_query = build_product_query(name, category, min_price, max_price)
+            result = await paginate_by_cursor(read_db, products_query, order_by, descending, size, cursor)
+            return result.json()
+
+        page_json = await get_cached_page(cache_key, load_page)
+
+        return await product_page_response(request, principal, db, page_json)
+    except AppException as e:
+        raise e
+    except Exception as e:
+        raise AppException(name="Product Retrieval Error", detail=str(e))
+
+@router.get("/facets", response_model=ProductFacets)
+async def get_facets(
+    request: Request,
+    category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    principal: Principal = Depends(get_current_principal)
+):
+    """Category counts and a price histogram for the filter sidebar.
+
+    Category counts follow the price filters; the histogram and total follow all of them.
+    """
+    try:
+        cache_key = await get_product_list_cache_key("facets", category, min_price, max_price)
+
+        async def load_page(read_db: AsyncSession) -> str:
+            facets = await get_product_facets(read_db, category, min_price, max_price)
+            return ProductFacets(**facets).json()
+
+        return json_page_response(request, await get_cached_page(cache_key, load_page))
+    except AppException as e:
+        raise e
+    except Exception as e:
+        raise AppException(name="Facet Retrieval Error", detail=str(e))
+
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: str, 
     product: ProductUpdate, 
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token)
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
 ):
     try:
-        user = admin_required(username, db)
+        admin_required(principal)
 
-        db_product = db.query(Product).filter(Product.id == product_id).first()
+        result = await db.execute(select(Product).where(Product.id == product_id))
+        db_product = result.scalars().first()
         if not db_product:
             raise AppException(name="Not Found", detail="Product not found")
         
-        for key, value in product.dict().items():
+        # Fields left out of the body keep their current value; clients editing
+        # the details without the image must not detach (and delete) it
+        changes = product.dict(exclude_unset=True)
+        previous_image_url = db_product.image_url
+        image_changed = "image_url" in changes and changes["image_url"] != previous_image_url
+        if image_changed:
+            db_product.thumbnail_url = None
+        await apply_facet_changes(
+            db, added=[(product.category, product.price)], removed=[(db_product.category, db_product.price)]
+        )
+        for key, value in changes.items():
             setattr(db_product, key, value)
         
-        db.commit()
-        db.refresh(db_product)
-        cache_key = f"{PRODUCT_LIST_INDEX}:{username}:*"
-        await delete_redis_cache(cache_key)
+        await db.commit()
+        await db.refresh(db_product)
+        if image_changed:
+            await release_images(db, [previous_image_url])
+        await invalidate_product_list_cache()
         return db_product
     except AppException as e:
         raise e
@@ -114,20 +177,22 @@ async def update_product(
 @router.delete("/{product_id}")
 async def delete_product(
     product_id: str, 
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token)
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
 ):
     try:
-        user = admin_required(username, db)
+        admin_required(principal)
 
-        db_product = db.query(Product).filter(Product.id == product_id).first()
+        result = await db.execute(select(Product).where(Product.id == product_id))
+        db_product = result.scalars().first()
         if not db_product:
             raise AppException(name="Not Found", detail="Product not found")
         
-        db.delete(db_product)
-        db.commit()
-        cache_key = f"{PRODUCT_LIST_INDEX}:{username}:*"
-        await delete_redis_cache(cache_key)
+        await db.delete(db_product)
+        await apply_facet_changes(db, removed=[(db_product.category, db_product.price)])
+        await db.commit()
+        await release_images(db, [db_product.image_url])
+        await invalidate_product_list_cache()
         return {"detail": "Product deleted successfully"}
     except AppException as e:
         raise e
@@ -137,24 +202,16 @@ async def delete_product(
 @router.post("/{product_id}/favorite")
 async def add_favorite(
     product_id: str,
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token)
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
 ):
     try:
-        user = get_user(username, db)
-
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
+        if not await product_exists(db, product_id):
             raise AppException(name="Not Found", detail="Product not found")
-        
-
-        cache_key = f"{PRODUCT_LIST_INDEX}:{username}:*"
-        await delete_redis_cache(cache_key)
 
-        if product not in user.favorite_products:
-            user.favorite_products.append(product)
-            db.commit()
-            await redis_client.delete(f"product_list:{username}:*")
+        if await add_favorite_product(db, principal.id, product_id):
+            await db.commit()
+            await invalidate_favorites_cache(principal.id)
             return {"detail": "Product added to favorites"}
         
 
@@ -168,21 +225,16 @@ async def add_favorite(
 @router.delete("/{product_id}/favorite")
 async def remove_favorite(
     product_id: str,
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token)
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal)
 ):
     try:
-        user = get_user(username, db)
-
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
+        if not await product_exists(db, product_id):
             raise AppException(name="Not Found", detail="Product not found")
 
-        cache_key = f"{PRODUCT_LIST_INDEX}:{username}:*"
-        await delete_redis_cache(cache_key)
-        if product in user.favorite_products:
-            user.favorite_products.remove(product)
-            db.commit()
+        if await remove_favorite_product(db, principal.id, product_id):
+            await db.commit()
+            await invalidate_favorites_cache(principal.id)
             return {"detail": "Product removed from favorites"}
         return {"detail": "Product not in favorites"}
     except AppException as e:
@@ -190,19 +242,24 @@ async def remove_favorite(
     except Exception as e:
         raise AppException(name="Favorite Removal Error", detail=str(e))
 
-@router.get("/favorites", response_model=List[ProductWithFavoriteResponse])
+@router.get("/favorites", response_model=ProductCursorPage)
 async def get_favorite_products(
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token)
+    request: Request,
+    cursor: Optional[str] = None,
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_session),
+    principal: Principal = Depends(get_current_principal)
 ):
     try:
-        user = get_user(username, db)
+        cache_key = await get_favorites_page_cache_key(principal.id, cursor, size)
 
-        favorites = [
-            {**product.__dict__, "is_favorite": True} 
-            for product in user.favorite_products
-        ]
-        return favorites
+        page_json = await get_redis_cache(cache_key)
+        if not page_json:
+            result = await paginate_favorites(db, principal.id, size, cursor)
+            page_json = result.json()
+            await set_redis_cache(cache_key, page_json)
+
+        return json_page_response(request, page_json)
     except AppException as e:
         raise e
     except Exception as e:
@@ -210,55 +267,64 @@ async def get_favorite_products(
     
     
 
-@router.post("/{product_id}/upload-image")
 async def upload_product_image(
     product_id: str,
     file: UploadFile = File(...),
-    db: Session = Depends(get_session_local),
-    username: str = Depends(verify_token),
+    db: AsyncSession = Depends(get_session_local),
+    principal: Principal = Depends(get_current_principal),
 ):
     try:
-        user = admin_required(username, db)
-        if file.content_type not in ["image/jpeg", "image/png"]:
-            raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG and PNG are allowed.")
+        admin_required(principal)
+        if file.content_type not in IMAGE_CONTENT_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG, PNG and WebP are allowed.")
 
-        product = db.query(Product).filter(Product.id == product_id).first()
+        result = await db.execute(select(Product).where(Product.id == product_id))
+        product = result.scalars().first()
         
         if not product:
             raise HTTPException(status_code=404, detail="Product not found.")
 
-        file_extension = file.filename.split(".")[-1]
-        filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = UPLOAD_DIR / filename
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        filename = await store_image_upload(file, IMAGE_CONTENT_TYPES[file.content_type])
+        original, webp, thumbnail = image_variant_names(filename)
 
-        product.image_url = f"/images/{filename}"
-        db.commit()
-        db.refresh(product)
+        previous_image_url = product.image_url
+        product.image_url = f"/images/{original}"
+        product.thumbnail_url = f"/images/{thumbnail}"
+        await db.commit()
+        await db.refresh(product)
+        await release_images(db, [previous_image_url])
         
-        cache_key = f"{PRODUCT_LIST_INDEX}:{username}:*"
-        await delete_redis_cache(cache_key)
+        await invalidate_product_list_cache()
         
         
-        return {"message": "File uploaded successfully", "filename": str(file_path)}
-    except AppException as e:
+        return {
+            "message": "File uploaded successfully",
+            "filename": str(UPLOAD_DIR / filename),
+            "image_url": product.image_url,
+            "thumbnail_url": product.thumbnail_url,
+            "webp_url": f"/images/{webp}",
+        }
+    except (AppException, HTTPException) as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
+
+router.add_api_route(
+    "/{product_id}/upload-image", upload_product_image, methods=["POST"], route_class_override=ImageUploadRoute
+)
+
 
 @router.get("/images/{filename}")
-async def serve_image(filename: str):
+async def serve_image(filename: str, request: Request):
     try:
         file_path = UPLOAD_DIR / filename
 
         if not file_path.exists() or not file_path.is_file():
             raise HTTPException(status_code=404, detail="Image not found")
-        
-        return FileResponse(file_path, media_type="image/jpeg")
-    except AppException as e:
+
+        # Same handler as the /images mount: ETag, 304, Range and immutable caching
+        return await image_files.get_response(filename, request.scope)
+    except (AppException, HTTPException) as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select
+from app.db.base import SessionLocal
+from app.db.models import Product
+from app.schemas.product import ProductBase
+from app.api.utils.utils import insert_new_products, invalidate_product_list_cache
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 100
+EXPORT_FIELDS = ["id", "name", "description", "price", "category", "image_url"]
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering more than one line."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Dict]]:
+    fieldnames = None
+    record, index = "", 0
+    async for line in iter_lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if fieldnames is None:
+            fieldnames = [name.strip() for name in values]
+            continue
+        yield index, {key: value if value != "" else None for key, value in zip(fieldnames, values)}
+        index += 1
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Dict]]:
+    index = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError as e:
+            yield index, {"__error__": f"Invalid JSON: {str(e)}"}
+        index += 1
+
+
+async def import_products(chunks: AsyncIterator[bytes], format: str) -> Dict:
+    """Validate and insert products chunk by chunk; memory stays bounded by IMPORT_CHUNK_SIZE."""
+    records = iter_csv_records(chunks) if format == "csv" else iter_ndjson_records(chunks)
+    summary = {"imported": 0, "failed": 0, "errors": []}
+
+    def report(error: Dict):
+        summary["failed"] += 1
+        if len(summary["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            summary["errors"].append(error)
+
+    async def flush(products):
+        async with SessionLocal() as db:
+            ids, errors = await insert_new_products(db, products)
+            await db.commit()
+        summary["imported"] += len(ids)
+        for error in errors:
+            report(error)
+
+    products = []
+    async for index, record in records:
+        if "__error__" in record:
+            report({"index": index, "detail": record["__error__"]})
+            continue
+        try:
+            products.append((index, ProductBase.parse_obj(record)))
+        except ValidationError as e:
+            report({"index": index, "detail": json.loads(e.json())})
+            continue
+        if len(products) >= IMPORT_CHUNK_SIZE:
+            await flush(products)
+            products = []
+    if products:
+        await flush(products)
+
+    if summary["imported"]:
+        await invalidate_product_list_cache()
+    return summary
+
+
+async def export_products(format: str, batch_size: int = IMPORT_CHUNK_SIZE) -> AsyncIterator[str]:
+    """Stream the whole catalog through a server-side cursor, one partition at a time."""
+    columns = [getattr(Product, field) for field in EXPORT_FIELDS]
+    query = select(*columns).order_by(Product.id).execution_options(yield_per=batch_size)
+    async with SessionLocal() as db:
+        result = await db.stream(query)
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_FIELDS)
+            yield buffer.getvalue()
+        async for rows in result.partitions():
+            if format == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(EXPORT_FIELDS, row)), separators=(",", ":")) + "\n" for row in rows
+                )
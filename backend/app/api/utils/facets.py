@@ -0,0 +1,132 @@
+import math
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.constants import PRICE_BUCKET_WIDTH
+from app.db.base import engine
+from app.db.models import Product, ProductFacet
+
+# (category, price) of a product as it is or was stored
+FacetValue = Tuple[str, float]
+
+
+def price_bucket(price) -> int:
+    return math.floor(float(price) / PRICE_BUCKET_WIDTH)
+
+
+async def apply_facet_changes(db: AsyncSession, added: Iterable[FacetValue] = (), removed: Iterable[FacetValue] = ()):
+    """Adjust the facet counts for products written in the current transaction; the caller commits.
+
+    Counts are incremented in place (INSERT ... ON CONFLICT DO UPDATE), so
+    concurrent writers never overwrite each other's changes.
+    """
+    deltas = Counter()
+    for category, price in added:
+        deltas[category, price_bucket(price)] += 1
+    for category, price in removed:
+        deltas[category, price_bucket(price)] -= 1
+    # Key order, so concurrent writers lock overlapping rows in the same order and cannot deadlock
+    rows = [
+        {"category": category, "price_bucket": bucket, "count": delta}
+        for (category, bucket), delta in sorted(deltas.items()) if delta
+    ]
+    if not rows:
+        return
+
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(engine.dialect.name)
+    if dialect is None:
+        raise NotImplementedError(f"No INSERT ... ON CONFLICT for {engine.dialect.name}")
+    statement = dialect.insert(ProductFacet).values(rows)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[ProductFacet.category, ProductFacet.price_bucket],
+        set_={"count": ProductFacet.count + statement.excluded.count},
+    ))
+    await db.execute(delete(ProductFacet).where(ProductFacet.count <= 0))
+
+
+async def rebuild_product_facets(db: AsyncSession) -> int:
+    """Recompute every facet count from the products table; the caller commits."""
+    result = await db.stream(
+        select(Product.category, Product.price, func.count()).group_by(Product.category, Product.price)
+    )
+    counts = Counter()
+    async for category, price, count in result:
+        if category is not None and price is not None:
+            counts[category, price_bucket(price)] += count
+    await db.execute(delete(ProductFacet))
+    if counts:
+        await db.execute(
+            ProductFacet.__table__.insert(),
+            [
+                {"category": category, "price_bucket": bucket, "count": count}
+                for (category, bucket), count in counts.items()
+            ],
+        )
+    return sum(counts.values())
+
+
+async def product_facets_missing(db: AsyncSession) -> bool:
+    """True when there are products but no facet rows, e.g. right after the table was created."""
+    return bool(await db.scalar(select(and_(select(Product.id).exists(), ~select(ProductFacet.category).exists()))))
+
+
+async def count_partial_bucket(
+    db: AsyncSession, bucket: int, min_price: Optional[float], max_price: Optional[float]
+) -> Dict[str, int]:
+    """Exact per-category counts for the part of one bucket inside the price range.
+
+    Only the products priced within that single bucket are read (ix_products_price_id).
+    """
+    query = select(Product.category, func.count()).where(
+        Product.price >= max(bucket * PRICE_BUCKET_WIDTH, min_price or 0),
+        Product.price < (bucket + 1) * PRICE_BUCKET_WIDTH,
+    )
+    if max_price:
+        query = query.where(Product.price <= max_price)
+    result = await db.execute(query.group_by(Product.category))
+    return dict(result.all())
+
+
+async def get_product_facets(
+    db: AsyncSession,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> dict:
+    """Category counts and a price histogram from the facet table.
+
+    Category counts honour the price range but not the category filter, so the
+    sidebar can offer the other categories; the histogram and total honour both.
+    Buckets cut by min_price or max_price are counted exactly from products.
+    """
+    partial_buckets = sorted({price_bucket(price) for price in (min_price, max_price) if price})
+    query = select(ProductFacet.category, ProductFacet.price_bucket, ProductFacet.count)
+    if min_price:
+        query = query.where(ProductFacet.price_bucket > price_bucket(min_price))
+    if max_price:
+        query = query.where(ProductFacet.price_bucket < price_bucket(max_price))
+    result = await db.execute(query)
+    rows = list(result.all())
+    for bucket in partial_buckets:
+        counts = await count_partial_bucket(db, bucket, min_price, max_price)
+        rows.extend((bucket_category, bucket, count) for bucket_category, count in counts.items())
+
+    categories, histogram = Counter(), Counter()
+    for row_category, bucket, count in rows:
+        categories[row_category] += count
+        if category is None or row_category == category:
+            histogram[bucket] += count
+
+    return {
+        "total": sum(histogram.values()),
+        "categories": [
+            {"category": name, "count": count}
+            for name, count in sorted(categories.items(), key=lambda item: (-item[1], item[0])) if count
+        ],
+        "price_histogram": [
+            {"min": bucket * PRICE_BUCKET_WIDTH, "max": (bucket + 1) * PRICE_BUCKET_WIDTH, "count": count}
+            for bucket, count in sorted(histogram.items()) if count
+        ],
+    }
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from typing import List, Optional
+from fastapi import HTTPException, Request, Response, UploadFile
+from fastapi.routing import APIRoute
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.constants import UPLOAD_DIR, UPLOAD_TEMP_DIR, UPLOAD_CHUNK_SIZE
+from app.core.images import generate_image_variants, image_variant_names
+from app.db.models import Product
+
+IMAGE_URL_PREFIX = "/images/"
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+class ImageUploadRoute(APIRoute):
+    """Route that rejects oversized uploads from their Content-Length.
+
+    FastAPI parses (and spools) the whole multipart body before the endpoint
+    runs, so the cap has to be checked here. The server never reads past the
+    declared length, which makes it a bound on what is received.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def check_upload_size(request: Request) -> Response:
+            length = request.headers.get("content-length", "")
+            if not length.isdigit():
+                raise HTTPException(status_code=411, detail="Content-Length is required.")
+            if int(length) > settings.MAX_IMAGE_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+                raise HTTPException(status_code=413, detail="Image is too large.")
+            return await handler(request)
+
+        return check_upload_size
+
+
+async def store_image_upload(file: UploadFile, extension: str) -> str:
+    """Stream an upload to disk under its SHA-256 digest and return the file name.
+
+    Identical uploads map to the same file, so they are stored (and resized) once.
+    """
+    digest = hashlib.sha256()
+    temp_path = UPLOAD_TEMP_DIR / f"upload-{uuid.uuid4()}"
+    try:
+        size = 0
+        with open(temp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.MAX_IMAGE_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Image is too large.")
+                digest.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        # Identical content, so replacing an existing copy is harmless; the fresh mtime
+        # keeps release_images and gc-images from deleting it before our reference commits
+        os.replace(temp_path, UPLOAD_DIR / filename)
+        if not all((UPLOAD_DIR / name).exists() for name in image_variant_names(filename)):
+            try:
+                await generate_image_variants(UPLOAD_DIR / filename)
+            except Exception:
+                remove_image_files(filename)
+                raise HTTPException(status_code=400, detail="The file is not a valid image.")
+        return filename
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def image_filename(image_url: Optional[str]) -> Optional[str]:
+    if image_url and image_url.startswith(IMAGE_URL_PREFIX):
+        return image_url[len(IMAGE_URL_PREFIX):]
+    return None
+
+
+def remove_image_files(filename: str):
+    for name in image_variant_names(filename):
+        (UPLOAD_DIR / name).unlink(missing_ok=True)
+
+
+async def release_images(db: AsyncSession, image_urls):
+    """Delete stored images that no product references any more. Call after committing.
+
+    An upload of the same content may have replaced the file without having
+    committed its reference yet, so files written within settings.IMAGE_RELEASE_MIN_AGE
+    seconds are left for `gc-images` instead.
+    """
+    cutoff = time.time() - settings.IMAGE_RELEASE_MIN_AGE
+    for image_url in {url for url in image_urls if image_filename(url)}:
+        result = await db.execute(select(func.count()).select_from(Product).where(Product.image_url == image_url))
+        if result.scalar_one() == 0:
+            filename = image_filename(image_url)
+            try:
+                if (UPLOAD_DIR / filename).stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                pass
+            remove_image_files(filename)
+
+
+async def collect_orphaned_images(db: AsyncSession, min_age_seconds: int = 3600) -> List[str]:
+    """Remove originals and variants that no product references.
+
+    Files younger than min_age_seconds are kept so uploads still in flight are not collected.
+    """
+    result = await db.execute(select(Product.image_url).where(Product.image_url.is_not(None)).distinct())
+    referenced = set()
+    for image_url in result.scalars():
+        filename = image_filename(image_url)
+        if filename:
+            referenced.update(image_variant_names(filename))
+
+    removed = []
+    cutoff = time.time() - min_age_seconds
+    for path in UPLOAD_DIR.iterdir():
+        if path.is_file() and path.name not in referenced and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed.append(path.name)
+    # Temp files left behind by a worker that died mid-upload
+    for path in UPLOAD_TEMP_DIR.iterdir():
+        if path.is_file() and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed.append(path.name)
+    return removed
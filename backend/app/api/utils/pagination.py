@@ -0,0 +1,179 @@
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Optional, List, Sequence
+import orjson
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Product, user_favorite_products
+from app.core.exceptions import AppException
+from app.schemas.product import ProductCursorPage, ProductWithFavoriteResponse
+
+# Columns a list item can carry. id and is_favorite are always sent, and last:
+# the favorite overlay on cached pages matches "id":"...","is_favorite":false.
+PRODUCT_LIST_COLUMNS = {
+    "name": Product.name,
+    "description": Product.description,
+    "price": Product.price,
+    "category": Product.category,
+    "image_url": Product.image_url,
+    "thumbnail_url": Product.thumbnail_url,
+}
+
+
+def parse_product_fields(fields: Optional[str]) -> List[str]:
+    """Turn ?fields=name,price into list columns in canonical order (all of them when unset)."""
+    if not fields:
+        return list(PRODUCT_LIST_COLUMNS)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - PRODUCT_LIST_COLUMNS.keys() - {"id", "is_favorite"}
+    if unknown:
+        raise AppException(name="Invalid Fields", detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in PRODUCT_LIST_COLUMNS if field in requested]
+
+
+def serialize_product_page(rows: Sequence, fields: List[str], total: int, page: int, size: int) -> str:
+    """Render rows of (*fields, id) as Page JSON without building ORM objects or pydantic models."""
+    price_index = fields.index("price") if "price" in fields else None
+    items = []
+    for row in rows:
+        item = dict(zip(fields, row))
+        if price_index is not None and row[price_index] is not None:
+            # Same rendering as ProductResponse: two decimals, as a string
+            item["price"] = f"{row[price_index]:.2f}"
+        item["id"] = row[-1]
+        item["is_favorite"] = False
+        items.append(item)
+    pages = math.ceil(total / size) if size else 0
+    return orjson.dumps({"items": items, "total": total, "page": page, "size": size, "pages": pages}).decode()
+
+
+async def paginate_product_rows(db: AsyncSession, query, page: int, size: int, fields: List[str]) -> str:
+    """Offset pagination that selects only the requested list columns."""
+    total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+    columns = [PRODUCT_LIST_COLUMNS[field] for field in fields] + [Product.id]
+    result = await db.execute(query.with_only_columns(*columns).offset((page - 1) * size).limit(size))
+    return serialize_product_page(result.all(), fields, total, page, size)
+
+
+# Keyset columns per ordering; id breaks ties so the key is unique.
+CURSOR_ORDERINGS = {
+    "created_at": Product.created_at,
+    "price": Product.price,
+}
+
+
+def encode_cursor(order_by: str, direction: str, product: Product) -> str:
+    value = getattr(product, order_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"o": order_by, "d": direction, "k": [value, product.id]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, product_id = payload["k"]
+        if payload["o"] != order_by or payload["d"] not in ("next", "prev"):
+            raise ValueError("cursor does not match the requested ordering")
+        if order_by == "created_at":
+            value = datetime.fromisoformat(value)
+        return payload["d"], value, product_id
+    except Exception:
+        raise AppException(name="Invalid Cursor", detail="The pagination cursor is invalid or expired.")
+
+
+async def paginate_by_cursor(
+    db: AsyncSession,
+    query,
+    order_by: str,
+    descending: bool,
+    size: int,
+    cursor: Optional[str] = None,
+) -> ProductCursorPage:
+    """Keyset pagination over (order_by, id) without OFFSET or COUNT(*)."""
+    column = CURSOR_ORDERINGS[order_by]
+    key = tuple_(column, Product.id)
+    direction, value, product_id = decode_cursor(cursor, order_by) if cursor else ("next", None, None)
+
+    # Walking backwards is the same scan with the ordering flipped
+    backwards = descending != (direction == "prev")
+    if value is not None:
+        bound = tuple_(value, product_id)
+        query = query.where(key < bound if backwards else key > bound)
+    if backwards:
+        query = query.order_by(column.desc(), Product.id.desc())
+    else:
+        query = query.order_by(column.asc(), Product.id.asc())
+
+    result = await db.execute(query.limit(size + 1))
+    products = list(result.scalars().all())
+    has_more = len(products) > size
+    products = products[:size]
+    if direction == "prev":
+        products.reverse()
+
+    next_cursor = prev_cursor = None
+    if products:
+        if direction == "next" and has_more or direction == "prev":
+            next_cursor = encode_cursor(order_by, "next", products[-1])
+        if direction == "prev" and has_more or direction == "next" and cursor:
+            prev_cursor = encode_cursor(order_by, "prev", products[0])
+
+    return ProductCursorPage(
+        items=[ProductWithFavoriteResponse.model_validate(product) for product in products],
+        size=size,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
+
+
+def encode_favorites_cursor(product_id: str) -> str:
+    payload = json.dumps({"o": "favorites", "d": "next", "k": [product_id]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_favorites_cursor(cursor: str) -> str:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["o"] != "favorites" or payload["d"] != "next":
+            raise ValueError("cursor does not match the requested ordering")
+        return str(payload["k"][0])
+    except Exception:
+        raise AppException(name="Invalid Cursor", detail="The pagination cursor is invalid or expired.")
+
+
+async def paginate_favorites(
+    db: AsyncSession,
+    user_id: str,
+    size: int,
+    cursor: Optional[str] = None,
+) -> ProductCursorPage:
+    """Forward keyset pagination over the user's favorites.
+
+    Products are joined in the same statement and the scan follows the
+    (user_id, product_id) primary key, so a page costs one indexed range read.
+    """
+    favorites = user_favorite_products.c
+    query = (
+        select(Product)
+        .join(user_favorite_products, favorites.product_id == Product.id)
+        .where(favorites.user_id == user_id)
+    )
+    if cursor:
+        query = query.where(favorites.product_id > decode_favorites_cursor(cursor))
+    result = await db.execute(query.order_by(favorites.product_id).limit(size + 1))
+    products = list(result.scalars().all())
+    has_more = len(products) > size
+    products = products[:size]
+
+    return ProductCursorPage(
+        items=[
+            ProductWithFavoriteResponse.model_validate(product).model_copy(update={"is_favorite": True})
+            for product in products
+        ],
+        size=size,
+        next_cursor=encode_favorites_cursor(products[-1].id) if has_more else None,
+    )
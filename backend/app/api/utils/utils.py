@@ -1,58 +1,493 @@
-from app.db.models import Product, User
-from sqlalchemy.orm import Session
-from typing import Optional
+from app.db.models import Product, User, user_favorite_products
+import hashlib
+import uuid
+import json
+import re
+import asyncio
+import logging
+import time
+from sqlalchemy import select, insert, delete, exists, func, literal, literal_column, or_, table, column
+from sqlalchemy.dialects import postgresql, sqlite
+from app.api.utils.facets import apply_facet_changes
+from app.db.base import engine, replicas, after_write_hooks, get_session_local, SessionLocal, ReadSessionLocal
+from app.core.security import security, decode_token, create_access_token
+from app.schemas.user import Principal
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Set, Dict, Any, Tuple, Callable, Awaitable
+from pydantic import BaseModel, ValidationError
+from app.core.config import settings
 from app.core.exceptions import AppException
-from app.core.cache import redis_client
-from fastapi import HTTPException
+from app.core.cache import redis_client, local_cache, cache_stats, publish_invalidation, acquire_lock, release_lock
+from app.core.metrics import REDIS_COMMAND_DURATION
+from fastapi import HTTPException, Request, Depends, Security
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.responses import Response
+from app.core.constants import PRODUCT_LIST_INDEX, PRODUCT_LIST_GENERATION, FAVORITES_INDEX, FAVORITES_SENTINEL, FAVORITES_TTL, FAVORITES_PAGE_INDEX, FAVORITES_GENERATION_INDEX, PRINCIPAL_VERSION_INDEX, PRIMARY_READS_INDEX, CACHE_LOCK_INDEX
 
-def get_user(username: str, db: Session) -> User:
-    user = db.query(User).filter(User.username == username).first()
+logger = logging.getLogger(__name__)
+
+async def get_user(username: str, db: AsyncSession) -> User:
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if not user:
         raise AppException(name="Authorization Error", detail="User not found")
     return user
 
-def admin_required(username: str, db: Session):
-    user = get_user(username, db)
-    if not user or user.role != "admin":
+def admin_required(principal: Principal) -> Principal:
+    if principal.role != "admin":
         raise HTTPException(status_code=403, detail="You do not have permission to perform this action.")
-    return user
+    return principal
+
+
+async def get_principal_version(user_id: str) -> Optional[str]:
+    """The user's current token version; None if the user does not exist.
+
+    users.token_version is the source of truth and Redis only caches it, so a
+    flushed or evicted key is reloaded from the row rather than read as a default.
+    """
+    key = f"{PRINCIPAL_VERSION_INDEX}:{user_id}"
+    version = local_cache.get(key)
+    if version is not None:
+        return version
+    try:
+        version = await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Could not read the token version of {user_id} from Redis: {str(e)}")
+    if version is None:
+        async with SessionLocal() as db:
+            token_version = await db.scalar(select(User.token_version).where(User.id == user_id))
+        if token_version is None:
+            return None
+        version = str(token_version)
+        try:
+            # NX: a concurrent invalidate_principal may already have stored a newer version
+            await redis_client.set(key, version, nx=True)
+        except Exception as e:
+            logger.warning(f"Could not cache the token version of {user_id}: {str(e)}")
+    local_cache.set(key, version)
+    return version
+
+async def invalidate_principal(user: User):
+    """Publish a committed token_version bump; tokens carrying the old version fall back to the database."""
+    key = f"{PRINCIPAL_VERSION_INDEX}:{user.id}"
+    await redis_client.set(key, str(user.token_version))
+    await publish_invalidation(key)
+
+async def issue_access_token(user: User) -> str:
+    return create_access_token(
+        data={"sub": user.username, "uid": user.id, "role": user.role, "tv": str(user.token_version)}
+    )
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    db: AsyncSession = Depends(get_session_local),
+) -> Principal:
+    """Resolve the caller from token claims, touching the users table only for stale or legacy tokens."""
+    payload = decode_token(credentials.credentials)
+    if {"uid", "role", "tv"} <= payload.keys() and payload["tv"] == await get_principal_version(payload["uid"]):
+        principal = Principal(id=payload["uid"], username=payload["sub"], role=payload["role"])
+    else:
+        user = await get_user(payload["sub"], db)
+        principal = Principal(id=user.id, username=user.username, role=user.role)
+    # Lets the after-write hook pin this user's reads to the primary
+    db.info["principal_id"] = principal.id
+    return principal
+
+
+def get_primary_reads_key(scope: str) -> str:
+    return f"{PRIMARY_READS_INDEX}:{scope}"
+
+
+async def pin_reads_to_primary(scope: str):
+    """Send reads in scope to the primary until the replicas have caught up with a write."""
+    if replicas.engines:
+        await redis_client.set(get_primary_reads_key(scope), 1, px=int(settings.READ_YOUR_WRITES_SECONDS * 1000))
+
+
+async def pin_writer_reads(session: AsyncSession):
+    if "principal_id" in session.info:
+        await pin_reads_to_primary(session.info["principal_id"])
+
+after_write_hooks.append(pin_writer_reads)
+
+
+async def get_read_engine(*scopes: str):
+    """A healthy replica, or the primary when any scope wrote within READ_YOUR_WRITES_SECONDS."""
+    if not replicas.engines:
+        return engine
+    try:
+        pinned = await redis_client.mget(*map(get_primary_reads_key, scopes))
+    except Exception as e:
+        logger.warning(f"Could not check read-your-writes pins, reading from the primary: {str(e)}")
+        return engine
+    return engine if any(pinned) else replicas.pick() or engine
+
+
+async def get_read_session(principal: Principal = Depends(get_current_principal)):
+    """Session for read-only endpoints; the caller's own writes and catalog
+    changes are read back from the primary."""
+    async with ReadSessionLocal(bind=await get_read_engine(principal.id, "catalog")) as session:
+        yield session
 
 
 def build_product_query(
-    db: Session, 
     name: Optional[str] = None, 
     category: Optional[str] = None, 
     min_price: Optional[float] = None, 
-    max_price: Optional[float] = None
+    max_price: Optional[float] = None,
+    search: Optional[str] = None
 ):
-    products_query = db.query(Product)
+    products_query = select(Product)
+    if search:
+        products_query = apply_product_search(products_query, search)
     if name:
-        products_query = products_query.filter(Product.name.ilike(f"%{name}%"))
+        products_query = products_query.where(Product.name.ilike(f"%{name}%"))
     if category:
-        products_query = products_query.filter(Product.category == category)
+        products_query = products_query.where(Product.category == category)
     if min_price:
-        products_query = products_query.filter(Product.price >= min_price)
+        products_query = products_query.where(Product.price >= min_price)
     if max_price:
-        products_query = products_query.filter(Product.price <= max_price)
+        products_query = products_query.where(Product.price <= max_price)
         
         
     return products_query
 
 
+products_fts = table("products_fts", column("rowid"), column("products_fts"))
+
+def apply_product_search(products_query, search: str):
+    """Filter by name/description and order by relevance using the search index.
+
+    Typo tolerance needs pg_trgm, so it is PostgreSQL-only: the SQLite fallback
+    (FTS5 trigram) matches substrings only.
+    """
+    if engine.dialect.name == "sqlite":
+        if len(search) < 3:
+            # The FTS5 trigram tokenizer cannot match terms shorter than a trigram
+            return products_query.where(
+                or_(Product.name.ilike(f"%{search}%"), Product.description.ilike(f"%{search}%"))
+            ).order_by(Product.name)
+        phrase = '"' + search.replace('"', '""') + '"'
+        return (
+            products_query
+            .join(products_fts, products_fts.c.rowid == literal_column("products.rowid"))
+            .where(products_fts.c.products_fts.op("MATCH")(phrase))
+            .order_by(func.bm25(literal_column("products_fts"), 10.0, 1.0), Product.id)
+        )
+
+    # pg_trgm: ILIKE for substrings, <% (word similarity) for typos; both use the GIN indexes
+    return products_query.where(
+        or_(
+            Product.name.ilike(f"%{search}%"),
+            Product.description.ilike(f"%{search}%"),
+            literal(search).op("<%")(Product.name),
+        )
+    ).order_by(func.word_similarity(search, Product.name).desc(), Product.id)
+
+
+def check_batch_size(items: list):
+    if not items:
+        raise AppException(name="Batch Error", detail="The batch is empty.")
+    if len(items) > settings.PRODUCT_BATCH_MAX_SIZE:
+        raise AppException(
+            name="Batch Error", detail=f"A batch may contain at most {settings.PRODUCT_BATCH_MAX_SIZE} items."
+        )
+
+def validate_batch_items(items: List[Any], schema: type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[dict]]:
+    """Validate each item on its own; returns (index, model) pairs and per-item errors."""
+    check_batch_size(items)
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.parse_obj(item)))
+        except ValidationError as e:
+            item_id = item.get("id") if isinstance(item, dict) else None
+            errors.append({"index": index, "id": item_id, "detail": json.loads(e.json())})
+    return valid, errors
+
+async def insert_new_products(db: AsyncSession, products: List[Tuple[int, BaseModel]]) -> Tuple[List[str], List[dict]]:
+    """Insert validated products in one executemany, skipping names that already exist.
+
+    Returns the new ids and per-item errors; the caller commits.
+    """
+    names = [product.name for _, product in products]
+    result = await db.execute(select(Product.name).where(Product.name.in_(names)))
+    taken = set(result.scalars().all())
+
+    rows, errors = [], []
+    for index, product in products:
+        if product.name in taken:
+            errors.append({"index": index, "detail": "A product with the same name already exists."})
+            continue
+        taken.add(product.name)
+        rows.append({**product.dict(), "id": str(uuid.uuid4())})
+
+    if rows:
+        await db.execute(insert(Product), rows)
+        await apply_facet_changes(db, added=[(row["category"], row["price"]) for row in rows])
+    return [row["id"] for row in rows], errors
+
+
 async def set_redis_cache(cache_key:str,data,ex:int=60):
-    await redis_client.set(
-        cache_key, 
-        data, 
-        ex=ex
-    )
+    with REDIS_COMMAND_DURATION.labels("set").time():
+        await redis_client.set(
+            cache_key, 
+            data, 
+            ex=ex
+        )
+    local_cache.set(cache_key, data, ex)
 
 async def get_redis_cache(cache_key:str):
-    cached_data = await redis_client.get(cache_key)
+    cached_data = local_cache.get(cache_key)
+    if cached_data is not None:
+        return cached_data
+    with REDIS_COMMAND_DURATION.labels("get").time():
+        cached_data = await redis_client.get(cache_key)
     if cached_data:
+        cache_stats["redis"]["hits"] += 1
+        local_cache.set(cache_key, cached_data)
         return cached_data
+    cache_stats["redis"]["misses"] += 1
     return None
     
-async def delete_redis_cache(cache_key:str):
-    keys = await redis_client.keys(cache_key)
-    if keys:
-        await redis_client.delete(*keys)
\ No newline at end of file
+async def get_product_list_cache_key(*params) -> str:
+    # Keys embed the catalog generation, so bumping the counter orphans every
+    # cached page without scanning Redis. Pages are shared by all users.
+    generation = local_cache.get(PRODUCT_LIST_GENERATION)
+    if generation is None:
+        generation = await redis_client.get(PRODUCT_LIST_GENERATION) or "0"
+        local_cache.set(PRODUCT_LIST_GENERATION, generation)
+    return ":".join([PRODUCT_LIST_INDEX, generation, *map(str, params)])
+
+# Product list pages being computed by this worker for a miss, by cache key
+page_fills: Dict[str, asyncio.Task] = {}
+# Stale pages being refreshed in the background; these may give up and return None,
+# so misses never wait on them
+page_refreshes: Dict[str, asyncio.Task] = {}
+
+async def get_cached_page(cache_key: str, load_page: Callable[[AsyncSession], Awaitable[str]]) -> str:
+    """Return the cached page JSON for cache_key, computing it at most once at a time.
+
+    Entries live PRODUCT_LIST_CACHE_TTL + PRODUCT_LIST_STALE_TTL seconds in Redis.
+    Past the fresh part they are still served while a single background task
+    refreshes them. Concurrent misses in this worker share one computation and
+    other nodes wait on a Redis lock instead of querying the database too.
+    """
+    cached_data = local_cache.get(cache_key)
+    if cached_data is not None:
+        return cached_data
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.get(cache_key)
+    pipe.pttl(cache_key)
+    with REDIS_COMMAND_DURATION.labels("get").time():
+        cached_data, ttl_ms = await pipe.execute()
+    if cached_data:
+        fresh_ms = ttl_ms - settings.PRODUCT_LIST_STALE_TTL * 1000
+        if fresh_ms > 0:
+            cache_stats["redis"]["hits"] += 1
+            local_cache.set(cache_key, cached_data, fresh_ms / 1000)
+        else:
+            cache_stats["redis"]["stale_hits"] += 1
+            if cache_key not in page_refreshes:
+                page_refreshes[cache_key] = asyncio.create_task(fill_page_cache(cache_key, load_page, refresh=True))
+        return cached_data
+
+    cache_stats["redis"]["misses"] += 1
+    fill = page_fills.get(cache_key)
+    if fill is None:
+        fill = page_fills[cache_key] = asyncio.create_task(fill_page_cache(cache_key, load_page))
+    else:
+        cache_stats["redis"]["coalesced"] += 1
+    # Shielded: a disconnecting client must not cancel the fill other requests wait on
+    return await asyncio.shield(fill)
+
+async def fill_page_cache(
+    cache_key: str, load_page: Callable[[AsyncSession], Awaitable[str]], refresh: bool = False
+) -> Optional[str]:
+    lock_key = f"{CACHE_LOCK_INDEX}:{cache_key}"
+    try:
+        try:
+            token = await acquire_lock(lock_key, settings.CACHE_LOCK_TIMEOUT_MS)
+        except Exception as e:
+            logger.warning(f"Could not take the cache lock for {cache_key}: {str(e)}")
+            token = ""
+        if token is None:
+            # Another node is computing this page
+            if refresh:
+                return None
+            page_json = await wait_for_page(cache_key)
+            if page_json:
+                return page_json
+        try:
+            async with ReadSessionLocal(bind=await get_read_engine("catalog")) as db:
+                page_json = await load_page(db)
+            await set_redis_cache(
+                cache_key, page_json, settings.PRODUCT_LIST_CACHE_TTL + settings.PRODUCT_LIST_STALE_TTL
+            )
+            local_cache.set(cache_key, page_json, settings.PRODUCT_LIST_CACHE_TTL)
+            return page_json
+        finally:
+            if token:
+                await release_lock(lock_key, token)
+    except Exception as e:
+        if not refresh:
+            raise
+        logger.warning(f"Background refresh of {cache_key} failed: {str(e)}")
+        return None
+    finally:
+        (page_refreshes if refresh else page_fills).pop(cache_key, None)
+
+async def wait_for_page(cache_key: str) -> Optional[str]:
+    """Poll for a page another node is filling; None if it does not show up in time."""
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT_MS / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.CACHE_LOCK_POLL_MS / 1000)
+        page_json = await redis_client.get(cache_key)
+        if page_json:
+            return page_json
+    return None
+
+async def invalidate_product_list_cache():
+    # Pin first: a replica read under the new generation would cache the old catalog
+    await pin_reads_to_primary("catalog")
+    await redis_client.incr(PRODUCT_LIST_GENERATION)
+    await publish_invalidation(PRODUCT_LIST_GENERATION)
+
+
+async def product_exists(db: AsyncSession, product_id: str) -> bool:
+    return bool(await db.scalar(select(exists().where(Product.id == product_id))))
+
+def insert_ignoring_duplicates(target):
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(engine.dialect.name)
+    if dialect is None:
+        raise NotImplementedError(f"No INSERT ... ON CONFLICT for {engine.dialect.name}")
+    return dialect.insert(target).on_conflict_do_nothing()
+
+async def add_favorite_product(db: AsyncSession, user_id: str, product_id: str) -> bool:
+    """Insert the favorite row; returns False when it already existed. The caller commits."""
+    result = await db.execute(
+        insert_ignoring_duplicates(user_favorite_products).values(user_id=user_id, product_id=product_id)
+    )
+    return result.rowcount == 1
+
+async def remove_favorite_product(db: AsyncSession, user_id: str, product_id: str) -> bool:
+    """Delete the favorite row; returns False when there was none. The caller commits."""
+    result = await db.execute(
+        delete(user_favorite_products).where(
+            user_favorite_products.c.user_id == user_id,
+            user_favorite_products.c.product_id == product_id,
+        )
+    )
+    return result.rowcount == 1
+
+
+# Favorite SETs being loaded into Redis, by user id
+favorite_warmups: Dict[str, asyncio.Task] = {}
+
+def get_favorites_key(user_id: str, generation: str) -> str:
+    # The SET is versioned by the user's favorites generation: a load that read the
+    # table before a toggle committed can only write a SET nobody reads any more
+    return f"{FAVORITES_INDEX}:{user_id}:{generation}"
+
+async def get_favorites_generation(user_id: str) -> str:
+    key = f"{FAVORITES_GENERATION_INDEX}:{user_id}"
+    generation = local_cache.get(key)
+    if generation is None:
+        generation = await redis_client.get(key) or "0"
+        local_cache.set(key, generation)
+    return generation
+
+async def warm_favorites_cache(user_id: str):
+    try:
+        # Read the generation before the table so the SET is never newer than its key
+        generation = await redis_client.get(f"{FAVORITES_GENERATION_INDEX}:{user_id}") or "0"
+        key = get_favorites_key(user_id, generation)
+        async with SessionLocal() as db:
+            result = await db.stream_scalars(
+                select(user_favorite_products.c.product_id).where(user_favorite_products.c.user_id == user_id)
+            )
+            favorites = [product_id async for product_id in result]
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.sadd(key, FAVORITES_SENTINEL, *favorites)
+        pipe.expire(key, FAVORITES_TTL)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not load favorites for {user_id}: {str(e)}")
+    finally:
+        favorite_warmups.pop(user_id, None)
+
+async def get_favorite_product_ids(user_id: str, db: AsyncSession, product_ids: List[str]) -> Set[str]:
+    """Return the subset of product_ids the user has favorited.
+
+    Favorites live in a Redis SET per user and favorites generation. On a miss
+    only the page's ids are looked up in the database, and the SET is loaded in
+    the background.
+    A sentinel member keeps the key alive for users without favorites.
+    """
+    if not product_ids:
+        return set()
+    key = get_favorites_key(user_id, await get_favorites_generation(user_id))
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.exists(key)
+    pipe.execute_command("SMISMEMBER", key, *product_ids)
+    with REDIS_COMMAND_DURATION.labels("smismember").time():
+        cached, flags = await pipe.execute()
+    if cached:
+        return {product_id for product_id, flag in zip(product_ids, flags) if int(flag)}
+
+    if user_id not in favorite_warmups:
+        favorite_warmups[user_id] = asyncio.create_task(warm_favorites_cache(user_id))
+    result = await db.execute(
+        select(user_favorite_products.c.product_id).where(
+            user_favorite_products.c.user_id == user_id,
+            user_favorite_products.c.product_id.in_(product_ids),
+        )
+    )
+    return set(result.scalars().all())
+
+# Cached pages are compact Page[ProductWithFavoriteResponse] JSON in which every
+# item ends with "id":"...","is_favorite":false, so flags can be set in place.
+PAGE_ITEM_ID = re.compile(r'"id":"([^"]+)","is_favorite":false')
+
+def get_page_product_ids(page_json: str) -> List[str]:
+    return PAGE_ITEM_ID.findall(page_json)
+
+def apply_favorite_flags(page_json: str, favorite_ids: Set[str]) -> str:
+    for product_id in favorite_ids:
+        page_json = page_json.replace(
+            f'"id":"{product_id}","is_favorite":false', f'"id":"{product_id}","is_favorite":true'
+        )
+    return page_json
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+async def product_page_response(request: Request, principal: Principal, db: AsyncSession, page_json: str) -> Response:
+    # Serve the cached JSON as-is: only the caller's favorite flags are patched in
+    favorite_products = await get_favorite_product_ids(principal.id, db, get_page_product_ids(page_json))
+    return json_page_response(request, apply_favorite_flags(page_json, favorite_products))
+
+def json_page_response(request: Request, page_json: str) -> Response:
+    body = page_json.encode()
+    headers = {"ETag": make_etag(body), "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def get_favorites_page_cache_key(user_id: str, *params) -> str:
+    # Cached favorites pages go stale when the user toggles a favorite (per-user
+    # generation) or when any product changes (catalog generation).
+    generation = await get_favorites_generation(user_id)
+    return await get_product_list_cache_key(FAVORITES_PAGE_INDEX, user_id, generation, *params)
+
+async def invalidate_favorites_cache(user_id: str):
+    # Moving to a new generation retires the SET for every worker and node,
+    # including loads still in flight elsewhere; cancelling ours just saves the work
+    warmup = favorite_warmups.pop(user_id, None)
+    if warmup is not None:
+        warmup.cancel()
+    generation_key = f"{FAVORITES_GENERATION_INDEX}:{user_id}"
+    generation = await redis_client.incr(generation_key)
+    await publish_invalidation(generation_key)
+    await redis_client.delete(get_favorites_key(user_id, str(generation - 1)))
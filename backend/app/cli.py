@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from app.api.utils.catalog_io import import_products, export_products
+from app.api.utils.images import collect_orphaned_images
+from app.api.utils.facets import rebuild_product_facets
+from app.db.base import SessionLocal, engine
+
+
+def infer_format(path: str, format: str | None) -> str:
+    if format:
+        return format
+    return "csv" if Path(path).suffix.lower() == ".csv" else "ndjson"
+
+
+async def read_file(path: str, chunk_size: int = 1 << 16):
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+async def run_import(args):
+    summary = await import_products(read_file(args.path), infer_format(args.path, args.format))
+    print(json.dumps(summary, indent=2))
+
+
+async def run_export(args):
+    format = infer_format(args.path, args.format)
+    with (open(args.path, "w", newline="") if args.path != "-" else sys.stdout) as out:
+        async for chunk in export_products(format):
+            out.write(chunk)
+
+
+async def run_gc_images(args):
+    async with SessionLocal() as db:
+        removed = await collect_orphaned_images(db, min_age_seconds=args.min_age)
+    print(json.dumps({"removed": removed}, indent=2))
+
+
+async def run_rebuild_facets(args):
+    async with SessionLocal() as db:
+        products = await rebuild_product_facets(db)
+        await db.commit()
+    print(json.dumps({"products": products}, indent=2))
+
+
+COMMANDS = {
+    "import": run_import,
+    "export": run_export,
+    "gc-images": run_gc_images,
+    "rebuild-facets": run_rebuild_facets,
+}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Product catalog maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("import", "File to read"), ("export", "File to write, or - for stdout")):
+        command = commands.add_parser(name)
+        command.add_argument("path", help=help_text)
+        command.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    gc_images = commands.add_parser("gc-images", help="Remove stored images no product references")
+    gc_images.add_argument("--min-age", type=int, default=3600, help="Keep files younger than this many seconds")
+    commands.add_parser("rebuild-facets", help="Recompute the category and price facet counts")
+    args = parser.parse_args()
+    try:
+        await COMMANDS[args.command](args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
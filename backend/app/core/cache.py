@@ -1,5 +1,117 @@
 import aioredis
+import asyncio
+import logging
 import os
+import time
+import uuid
+from collections import Counter, OrderedDict
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
-redis_client = aioredis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
\ No newline at end of file
+redis_client = aioredis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+
+CACHE_INVALIDATION_CHANNEL = "cache-invalidation"
+
+# Delete the lock only if we still hold it; it may have expired and been taken by another node
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+
+# Hit/miss/eviction counters per cache tier
+cache_stats = {"local": Counter(), "redis": Counter()}
+
+
+class LocalCache:
+    """Bounded in-process LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            cache_stats["local"]["misses"] += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            cache_stats["local"]["expirations"] += 1
+            cache_stats["local"]["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        cache_stats["local"]["hits"] += 1
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            cache_stats["local"]["evictions"] += 1
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_cache = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TTL)
+
+
+async def publish_invalidation(key: str):
+    local_cache.delete(key)
+    await redis_client.publish(CACHE_INVALIDATION_CHANNEL, key)
+
+
+async def listen_for_invalidations():
+    """Evict keys from the local cache when any worker publishes an invalidation."""
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            # Messages may have been missed while we were not subscribed
+            local_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    local_cache.delete(message["data"])
+        except asyncio.CancelledError:
+            await pubsub.close()
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener error: {str(e)}")
+            local_cache.clear()
+            await pubsub.close()
+            await asyncio.sleep(1)
+
+
+async def acquire_lock(key: str, timeout_ms: int) -> str | None:
+    """Take a lock shared by every node; returns a token for release_lock, or None if it is held."""
+    token = uuid.uuid4().hex
+    if await redis_client.set(key, token, nx=True, px=timeout_ms):
+        return token
+    return None
+
+
+async def release_lock(key: str, token: str):
+    await release_lock_script(keys=[key], args=[token])
+
+
+def get_cache_stats() -> dict:
+    return {
+        "pid": os.getpid(),
+        "local_entries": len(local_cache),
+        **{tier: dict(counters) for tier, counters in cache_stats.items()},
+    }
@@ -1,4 +1,5 @@
 import os
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,7 +11,64 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecret")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    
+
+    # Database connection pool (per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: float = 30
+
+    # Read replicas for read-only endpoints; empty means everything uses DATABASE_URL.
+    # A user's reads stay on the primary for READ_YOUR_WRITES_SECONDS after they write.
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_HEALTH_CHECK_INTERVAL: float = 5
+    REPLICA_HEALTH_CHECK_TIMEOUT: float = 2
+    REPLICA_MAX_LAG_SECONDS: float = 10
+    READ_YOUR_WRITES_SECONDS: float = 5
+
+    # In-process cache in front of Redis (per worker process)
+    LOCAL_CACHE_MAX_ENTRIES: int = 1024
+    LOCAL_CACHE_TTL: float = 30
+
+    # Product list pages are fresh for PRODUCT_LIST_CACHE_TTL seconds, then served
+    # stale for up to PRODUCT_LIST_STALE_TTL more while one refresh runs in the background.
+    # A miss is computed once per key: other nodes wait up to CACHE_LOCK_WAIT_MS for it.
+    PRODUCT_LIST_CACHE_TTL: int = 60
+    PRODUCT_LIST_STALE_TTL: int = 300
+    CACHE_LOCK_TIMEOUT_MS: int = 10000
+    CACHE_LOCK_WAIT_MS: int = 3000
+    CACHE_LOCK_POLL_MS: int = 50
+
+    # Password hashing pool (per worker process)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5
+
+    # Rate limits are counted in Redis, so they hold across workers and nodes.
+    # RATE_LIMITS overrides a route's default, e.g. {"auth.login": "10/minute"}
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, str] = {}
+
+    PRODUCT_BATCH_MAX_SIZE: int = 5000
+
+    # Diagnostics: statements slower than this are logged (0 disables);
+    # admins can profile a request with ?profile=1 or an X-Profile header
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    # Bound parameters can hold secrets (password hashes, tokens); only log them when debugging
+    SLOW_QUERY_LOG_PARAMS: bool = False
+    SLOW_QUERY_MAX_PARAMS_LENGTH: int = 500
+    PROFILING_ENABLED: bool = True
+    PROFILE_MAX_ROWS: int = 50
+    # Bearer token Prometheus must send to scrape /metrics; empty disables the endpoint
+    METRICS_TOKEN: str = ""
+
+    # Image uploads
+    MAX_IMAGE_UPLOAD_BYTES: int = 5 * 1024 * 1024
+    IMAGE_WORKERS: int = 1
+    # Unreferenced images written more recently than this are left for gc-images
+    IMAGE_RELEASE_MIN_AGE: int = 600
+
     # Admin credentials
     ADMIN_USERNAME: str = os.getenv("ADMIN_USERNAME", "admin")
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "changeme")
@@ -20,8 +78,3 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 settings = Settings()
-
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
-limiter = Limiter(key_func=get_remote_address)
@@ -2,6 +2,24 @@ from pathlib import Path
 
 
 PRODUCT_LIST_INDEX="PRODUCT_LIST"
+PRODUCT_LIST_GENERATION="PRODUCT_LIST_GENERATION"
+FAVORITES_INDEX="FAVORITES"
+FAVORITES_SENTINEL="-"
+FAVORITES_TTL=3600
+FAVORITES_PAGE_INDEX="FAVORITES_PAGE"
+FAVORITES_GENERATION_INDEX="FAVORITES_GENERATION"
+PRINCIPAL_VERSION_INDEX="TOKEN_VERSION"
+RATE_LIMIT_INDEX="RATE_LIMIT"
+PRIMARY_READS_INDEX="PRIMARY_READS"
+CACHE_LOCK_INDEX="CACHE_LOCK"
 UPLOAD_DIR = Path("uploads/images")
+# In-flight uploads; kept outside UPLOAD_DIR, which is served at /images
+UPLOAD_TEMP_DIR = Path("uploads/tmp")
+UPLOAD_CHUNK_SIZE = 1 << 16
+THUMBNAIL_SIZE = (320, 320)
+# Width of the facet price histogram buckets; after changing it run `python -m app.cli rebuild-facets`
+PRICE_BUCKET_WIDTH = 10
+IMAGE_CONTENT_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
 
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_TEMP_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
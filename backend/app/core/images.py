@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from PIL import Image, ImageOps
+from fastapi.staticfiles import StaticFiles
+from app.core.config import settings
+from app.core.constants import THUMBNAIL_SIZE, UPLOAD_DIR
+
+# Resizing is CPU bound, so it runs in worker processes rather than threads
+image_executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+
+
+def make_image_variants(path: str) -> Dict[str, str]:
+    """Write a full-size WebP and a WebP thumbnail next to the original; returns their file names.
+
+    The variants get their own names even for WebP sources, so the original is never
+    overwritten: its name is the digest of the uploaded bytes.
+    """
+    source = Path(path)
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        webp = source.with_name(f"{source.stem}_full.webp")
+        image.save(webp, "WEBP", quality=85, method=4)
+        image.thumbnail(THUMBNAIL_SIZE)
+        thumbnail = source.with_name(f"{source.stem}_thumb.webp")
+        image.save(thumbnail, "WEBP", quality=80, method=4)
+    return {"webp": webp.name, "thumbnail": thumbnail.name}
+
+
+async def generate_image_variants(path: Path) -> Dict[str, str]:
+    return await asyncio.get_running_loop().run_in_executor(image_executor, make_image_variants, str(path))
+
+
+def image_variant_names(filename: str) -> List[str]:
+    stem = Path(filename).stem
+    return [filename, f"{stem}_full.webp", f"{stem}_thumb.webp"]
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files whose names are content digests, so they can be cached forever."""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 206, 304):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+image_files = ImmutableStaticFiles(directory=UPLOAD_DIR)
@@ -0,0 +1,115 @@
+import hmac
+from contextvars import ContextVar
+from dataclasses import dataclass
+from fastapi import HTTPException, Request
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+from app.core.config import settings
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ["method", "route", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database statements executed per request",
+    ["method", "route"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in database statements per request",
+    ["method", "route"], buckets=FAST_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Duration of individual database statements", buckets=FAST_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds", "Redis round trips made by the cache helpers",
+    ["command"], buckets=FAST_BUCKETS,
+)
+RATE_LIMIT_REJECTIONS = Counter("rate_limit_rejections_total", "Requests rejected by a rate limit", ["limit"])
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "bcrypt work per call, excluding time queued",
+    ["operation"], buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
+
+@dataclass
+class RequestStats:
+    db_queries: int = 0
+    db_seconds: float = 0.0
+
+
+# Set by the request middleware; database hooks add to it for the current request
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def record_db_query(duration: float):
+    DB_QUERY_DURATION.observe(duration)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += duration
+
+
+class StatsCollector:
+    """Expose the pool, cache and hashing counters the /internal endpoints already keep."""
+
+    def describe(self):
+        # Skip the registry's name check, which would call collect() during import
+        return []
+
+    def collect(self):
+        # Imported lazily: those modules import this one
+        from app.db.base import get_pool_stats
+        from app.core.cache import cache_stats, local_cache
+        from app.core.security import hash_stats
+
+        pool = get_pool_stats()
+        for name in ("checked_out", "overflow"):
+            gauge = GaugeMetricFamily(f"db_pool_{name}", f"Connection pool {name.replace('_', ' ')}")
+            gauge.add_metric([], pool[name])
+            yield gauge
+        checkouts = CounterMetricFamily("db_pool_checkouts", "Connection pool checkouts")
+        checkouts.add_metric([], pool["checkouts"])
+        yield checkouts
+        timeouts = CounterMetricFamily("db_pool_timeouts", "Connection pool checkout timeouts")
+        timeouts.add_metric([], pool["timeouts"])
+        yield timeouts
+
+        lookups = CounterMetricFamily("cache_events", "Cache hits, misses, expirations and evictions", labels=["tier", "event"])
+        for tier, counters in cache_stats.items():
+            for event, count in counters.items():
+                lookups.add_metric([tier, event], count)
+        yield lookups
+        entries = GaugeMetricFamily("cache_local_entries", "Entries in the in-process cache")
+        entries.add_metric([], len(local_cache))
+        yield entries
+
+        for name in ("queued", "in_flight"):
+            gauge = GaugeMetricFamily(f"password_hash_{name}", f"Password hashing calls {name.replace('_', ' ')}")
+            gauge.add_metric([], hash_stats[name])
+            yield gauge
+        rejected = CounterMetricFamily("password_hash_rejected", "Password hashing calls rejected as busy")
+        rejected.add_metric([], hash_stats["rejected"])
+        yield rejected
+
+
+REGISTRY.register(StatsCollector())
+
+
+def check_metrics_token(request: Request):
+    """Gate /metrics: it exposes the same counters as the admin-only /internal endpoints.
+
+    Scrapers send `Authorization: Bearer <METRICS_TOKEN>`; without a token configured
+    the endpoint is not served at all.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
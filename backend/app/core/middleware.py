@@ -1,16 +1,44 @@
 from fastapi import Request
 import logging
+import re
 import time
+from app.core.metrics import REQUEST_DURATION, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS, RequestStats, request_stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PATH_PARAM = re.compile(r"{(\w+)(?::\w+)?}")
+
+def route_template(request: Request) -> str:
+    # Label by template (/products/{product_id}), never by raw path, to bound cardinality
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # Routes of included routers may only know the path below their prefix
+    params = request.scope.get("path_params", {})
+    suffix = PATH_PARAM.sub(lambda m: str(params.get(m.group(1), m.group(0))), template)
+    path = request.scope["path"]
+    prefix = path[:-len(suffix)] if suffix and path.endswith(suffix) else ""
+    return prefix + template
+
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    duration = time.time() - start_time
-    logger.info(
-        f"Method: {request.method} Path: {request.url.path} "
-        f"Status: {response.status_code} Duration: {duration:.2f}s"
-    )
-    return response 
\ No newline at end of file
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    start_time = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        duration = time.perf_counter() - start_time
+        request_stats.reset(token)
+        route = route_template(request)
+        REQUEST_DURATION.labels(request.method, route, status_code).observe(duration)
+        REQUEST_DB_QUERIES.labels(request.method, route).observe(stats.db_queries)
+        REQUEST_DB_SECONDS.labels(request.method, route).observe(stats.db_seconds)
+        logger.info(
+            f"Method: {request.method} Path: {request.url.path} "
+            f"Status: {status_code} Duration: {duration:.2f}s Queries: {stats.db_queries}"
+        )
@@ -0,0 +1,80 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+from fastapi import HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.security import decode_token
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+
+# cProfile hooks the whole thread, so only one request is profiled at a time
+profile_lock = asyncio.Lock()
+
+
+def requested_profile_sort(request: Request) -> str | None:
+    """Return the pstats sort key asked for with ?profile= or X-Profile, if any."""
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY_PARAM)
+    if not settings.PROFILING_ENABLED or not flag or flag.lower() in ("0", "false", "no"):
+        return None
+    return flag if flag in PROFILE_SORT_KEYS else "cumulative"
+
+
+async def is_admin_request(request: Request) -> bool:
+    # Imported lazily: the API utilities import the core modules
+    from app.api.utils.utils import get_principal_version
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = decode_token(token)
+    except HTTPException:
+        return False
+    # Same rule as get_current_principal: claims only count while their version is current
+    return (
+        payload.get("role") == "admin"
+        and "uid" in payload
+        and "tv" in payload
+        and payload["tv"] == await get_principal_version(payload["uid"])
+    )
+
+
+async def profile_requests(request: Request, call_next):
+    """Run admin requests flagged with ?profile=1 (or X-Profile: 1) under cProfile.
+
+    The response body is drained and replaced by a plain-text report of the top
+    PROFILE_MAX_ROWS functions. Other coroutines that run on the event loop in
+    the meantime show up in the report too, so profile on a quiet instance.
+    """
+    sort = requested_profile_sort(request)
+    if sort is None or not await is_admin_request(request):
+        return await call_next(request)
+
+    async with profile_lock:
+        profiler = cProfile.Profile()
+        start_time = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await call_next(request)
+            body_size = 0
+            async for chunk in response.body_iterator:
+                body_size += len(chunk)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start_time
+
+    report = io.StringIO()
+    report.write(
+        f"{request.method} {request.url.path} -> {response.status_code}, "
+        f"{body_size} bytes in {duration * 1000:.1f} ms\n\n"
+    )
+    pstats.Stats(profiler, stream=report).strip_dirs().sort_stats(sort).print_stats(settings.PROFILE_MAX_ROWS)
+    return PlainTextResponse(
+        report.getvalue(),
+        headers={"X-Profiled-Status": str(response.status_code), "Cache-Control": "no-store"},
+    )
@@ -0,0 +1,143 @@
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable
+from fastapi import HTTPException, Request
+from app.core.cache import redis_client
+from app.core.config import settings
+from app.core.constants import RATE_LIMIT_INDEX
+from app.core.metrics import RATE_LIMIT_REJECTIONS, REDIS_COMMAND_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Sliding window counter: the previous window's count is weighted by how much of
+# it still overlaps the sliding window. Rejected calls are not counted, so a
+# client that keeps retrying recovers once the window slides past.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+if previous * (window - elapsed) / window + current + 1 > limit then
+    return {0, current, previous}
+end
+redis.call("INCR", KEYS[1])
+redis.call("PEXPIRE", KEYS[1], window * 2)
+return {1, current + 1, previous}
+"""
+sliding_window = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+RATE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d+)?\s*(second|minute|hour|day)s?\s*$")
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    window: int  # seconds
+
+    @classmethod
+    def parse(cls, rate: str) -> "Rate":
+        """Parse "5/minute", "100/hour" or "20/10 seconds"."""
+        match = RATE_PATTERN.match(rate)
+        if not match:
+            raise ValueError(f"Invalid rate limit: {rate!r}")
+        count, multiplier, period = match.groups()
+        return cls(limit=int(count), window=int(multiplier or 1) * PERIODS[period])
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int  # seconds until the current window ends
+    retry_after: int
+
+    def headers(self, rate: Rate) -> dict:
+        headers = {
+            "RateLimit-Policy": f"{rate.limit};w={rate.window}",
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+async def hit(key: str, rate: Rate) -> RateLimitResult:
+    """Count one call against key; a single EVALSHA round trip."""
+    window_ms = rate.window * 1000
+    now_ms = int(time.time() * 1000)
+    window_index, elapsed = divmod(now_ms, window_ms)
+    with REDIS_COMMAND_DURATION.labels("rate_limit").time():
+        allowed, current, previous = await sliding_window(
+            keys=[f"{key}:{window_index}", f"{key}:{window_index - 1}"],
+            args=[rate.limit, window_ms, elapsed],
+        )
+    weighted = previous * (window_ms - elapsed) / window_ms + current
+    return RateLimitResult(
+        allowed=bool(allowed),
+        limit=rate.limit,
+        remaining=max(0, math.floor(rate.limit - weighted)),
+        reset=math.ceil((window_ms - elapsed) / 1000),
+        retry_after=math.ceil(retry_after_ms(rate.limit, window_ms, elapsed, current, previous) / 1000),
+    )
+
+
+def retry_after_ms(limit: int, window_ms: int, elapsed: int, current: int, previous: int) -> float:
+    """How long until one more call fits, assuming no other calls arrive."""
+    if current + 1 <= limit:
+        # The previous window's share has to shrink: wait inside this window
+        if not previous:
+            return 0
+        needed = window_ms * (1 - (limit - 1 - current) / previous)
+        return max(0, needed - elapsed)
+    # This window is full: wait for it to end and for its share to shrink in the next one
+    needed = window_ms * (1 - (limit - 1) / current) if current else 0
+    return window_ms - elapsed + max(0, needed)
+
+
+def client_address(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(name: str, default: str, key_func: Callable[[Request], str] = client_address):
+    """Dependency that limits a route per client across every worker and node.
+
+    The rate comes from settings.RATE_LIMITS[name] when set, else `default`.
+    Limits are enforced in Redis; if Redis is unreachable the call is let through.
+    The RateLimit-* headers are kept on request.state and added by add_rate_limit_headers.
+    """
+    rate = Rate.parse(settings.RATE_LIMITS.get(name, default))
+
+    async def check_rate_limit(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        try:
+            result = await hit(f"{RATE_LIMIT_INDEX}:{name}:{key_func(request)}", rate)
+        except Exception as e:
+            logger.warning(f"Rate limit check for {name} failed, allowing the request: {str(e)}")
+            return
+        if not result.allowed:
+            RATE_LIMIT_REJECTIONS.labels(name).inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded: {rate.limit} per {rate.window} seconds",
+                headers=result.headers(rate),
+            )
+        request.state.rate_limit_headers = result.headers(rate)
+
+    return check_rate_limit
+
+
+async def add_rate_limit_headers(request: Request, call_next):
+    """Middleware: put the RateLimit-* headers on every response of a limited route, errors included."""
+    response = await call_next(request)
+    for header, value in getattr(request.state, "rate_limit_headers", {}).items():
+        response.headers.setdefault(header, value)
+    return response
@@ -1,7 +1,11 @@
 from passlib.context import CryptContext
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION
 import uuid
 from fastapi import Security, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -24,6 +28,49 @@ def get_password_hash(password: str) -> str:
         print(f"Password hashing error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error hashing password")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop.
+# The semaphore caps work handed to the pool; callers beyond it queue for up to
+# PASSWORD_HASH_QUEUE_TIMEOUT seconds and then get a 503.
+hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+hash_stats = Counter()
+
+async def run_in_hash_pool(func, *args):
+    hash_stats["queued"] += 1
+    try:
+        await asyncio.wait_for(hash_slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        hash_stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+    finally:
+        hash_stats["queued"] -= 1
+    hash_stats["in_flight"] += 1
+    timer = PASSWORD_HASH_DURATION.labels(func.__name__)
+
+    def timed_call():
+        with timer.time():
+            return func(*args)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, timed_call)
+    finally:
+        hash_stats["in_flight"] -= 1
+        hash_stats["completed"] += 1
+        hash_slots.release()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_in_hash_pool(get_password_hash, password)
+
+def get_hashing_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        **hash_stats,
+    }
+
 # Token creation utility
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     try:
@@ -41,16 +88,21 @@ def get_uuid4():
 
 security = HTTPBearer()
 
-async def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
+def decode_token(token: str) -> dict:
     try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        if payload.get("sub") is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return username
+        return payload
     except jwt.JWTError as e:
         print(f"Token verification error: {str(e)}")
         raise HTTPException(status_code=401, detail="Invalid token")
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
+    try:
+        return decode_token(credentials.credentials)["sub"]
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print(f"Unexpected error during token verification: {str(e)}")
         raise HTTPException(status_code=500, detail="Error verifying token")
\ No newline at end of file
@@ -1,11 +1,241 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, List, Optional
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import record_db_query
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    if driver:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def recreate(self):
+        # Keep the counters when the engine swaps in a fresh pool (dispose / invalidate)
+        pool = super().recreate()
+        pool.checkouts, pool.timeouts = self.checkouts, self.timeouts
+        pool.wait_total, pool.wait_max = self.wait_total, self.wait_max
+        return pool
+
+
+logger = logging.getLogger(__name__)
+
+
+def log_slow_query(statement: str, parameters, duration: float, executemany: bool):
+    if settings.SLOW_QUERY_LOG_PARAMS:
+        params = repr(parameters)
+        if len(params) > settings.SLOW_QUERY_MAX_PARAMS_LENGTH:
+            params = params[:settings.SLOW_QUERY_MAX_PARAMS_LENGTH] + "..."
+    else:
+        params = "<redacted>"
+    logger.warning(
+        f"Slow query ({duration * 1000:.1f} ms{', executemany' if executemany else ''}): "
+        f"{' '.join(statement.split())} | params: {params}"
+    )
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    record_db_query(duration)
+    if settings.SLOW_QUERY_THRESHOLD_MS and duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        log_slow_query(statement, parameters, duration, executemany)
+
+
+def drop_query_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def make_engine(database_url: str) -> AsyncEngine:
+    engine = create_async_engine(
+        get_async_database_url(database_url),
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", start_query_timer)
+    event.listen(engine.sync_engine, "after_cursor_execute", stop_query_timer)
+    event.listen(engine.sync_engine, "handle_error", drop_query_timer)
+    return engine
+
+
+# Seconds a streaming replica is behind; 0 when it has replayed everything it received
+POSTGRES_REPLICA_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaSet:
+    """Round robin over the read replicas that passed their last health check."""
+
+    def __init__(self, database_urls: List[str]):
+        self.engines = [make_engine(url) for url in database_urls]
+        self.healthy = [True] * len(self.engines)
+        self._next = 0
+        for engine in self.engines:
+            event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    def pick(self) -> Optional[AsyncEngine]:
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self.healthy[index]:
+                return self.engines[index]
+        return None
+
+    def _on_error(self, exception_context):
+        # Take a replica out as soon as a connection to it breaks; the monitor brings it back
+        if exception_context.is_disconnect:
+            for index, engine in enumerate(self.engines):
+                if engine.sync_engine is exception_context.engine:
+                    self.set_health(index, False, "connection lost")
+
+    def set_health(self, index: int, healthy: bool, reason: str = ""):
+        if self.healthy[index] != healthy:
+            url = self.engines[index].url.render_as_string(hide_password=True)
+            logger.warning(f"Read replica {url} is {'healthy' if healthy else f'unhealthy: {reason}'}")
+        self.healthy[index] = healthy
+
+    async def check(self, index: int):
+        engine = self.engines[index]
+        try:
+            async with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":
+                    lag = await asyncio.wait_for(conn.scalar(POSTGRES_REPLICA_LAG), settings.REPLICA_HEALTH_CHECK_TIMEOUT)
+                else:
+                    lag = await asyncio.wait_for(conn.scalar(text("SELECT 0")), settings.REPLICA_HEALTH_CHECK_TIMEOUT)
+        except Exception as e:
+            self.set_health(index, False, str(e) or type(e).__name__)
+            return
+        if float(lag or 0) > settings.REPLICA_MAX_LAG_SECONDS:
+            self.set_health(index, False, f"{float(lag):.1f}s behind the primary")
+        else:
+            self.set_health(index, True)
+
+    async def monitor(self):
+        while True:
+            await asyncio.gather(*(self.check(index) for index in range(len(self.engines))))
+            await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_INTERVAL)
+
+    async def dispose(self):
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> List[dict]:
+        return [
+            {"url": engine.url.render_as_string(hide_password=True), "healthy": healthy}
+            for engine, healthy in zip(self.engines, self.healthy)
+        ]
+
+
+# Async callables taking the session, run after each committed write
+after_write_hooks: List[Callable[[AsyncSession], Awaitable[None]]] = []
+
+
+class PrimarySession(Session):
+    """Sessions on the primary; records whether the current transaction wrote anything."""
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def flag_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def flag_statement_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+class TrackedAsyncSession(AsyncSession):
+    """Runs after_write_hooks once a transaction that wrote has committed."""
+
+    async def commit(self):
+        wrote = self.info.pop("wrote", False)
+        await super().commit()
+        if wrote:
+            for hook in after_write_hooks:
+                try:
+                    await hook(self)
+                except Exception as e:
+                    logger.warning(f"After-write hook {hook.__name__} failed: {str(e)}")
+
+
+engine = make_engine(settings.DATABASE_URL)
+replicas = ReplicaSet(settings.DATABASE_REPLICA_URLS)
+
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=TrackedAsyncSession, sync_session_class=PrimarySession,
+    autoflush=False, expire_on_commit=False,
+)
+# Bound per request to whichever engine serves the read
+ReadSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_session_local():
-    yield SessionLocal()
\ No newline at end of file
+async def get_session_local():
+    async with SessionLocal() as session:
+        yield session
+
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    return {
+        "pid": os.getpid(),
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "wait_avg_ms": round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+        "wait_max_ms": round(pool.wait_max * 1000, 3),
+        "replicas": replicas.stats(),
+    }
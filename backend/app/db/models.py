@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Boolean, DateTime, Table, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, Table, ForeignKey, Index, DDL, event
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime
@@ -7,8 +7,10 @@ from datetime import datetime
 user_favorite_products = Table(
     "user_favorite_products",
     Base.metadata,
-    Column("user_id", String, ForeignKey("users.id")),
-    Column("product_id", String, ForeignKey("products.id")),
+    # The composite key doubles as the (user_id, product_id) membership index
+    Column("user_id", String, ForeignKey("users.id"), primary_key=True),
+    Column("product_id", String, ForeignKey("products.id"), primary_key=True),
+    Index("ix_user_favorite_products_product_id", "product_id"),
 )
 
 class Product(Base):
@@ -19,9 +21,29 @@ class Product(Base):
     price = Column(Float)
     category = Column(String)
     image_url = Column(String, nullable=True)
+    thumbnail_url = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Keyset pagination orders by (created_at, id) or (price, id)
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        # Category equality plus an optional price range, the most common filter mix
+        Index("ix_products_category_price", "category", "price"),
+        # Reference counting for content-addressed images
+        Index("ix_products_image_url", "image_url"),
+        # Trigram indexes let ILIKE '%term%' and fuzzy matches skip the sequential scan
+        Index(
+            "ix_products_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_products_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     # Add relationship
     favorited_by = relationship(
         "User",
@@ -29,12 +51,21 @@ class Product(Base):
         back_populates="favorite_products"
     )
 
+class ProductFacet(Base):
+    """Product count per category and price bucket, maintained by the product write paths."""
+    __tablename__ = "product_facets"
+    category = Column(String, primary_key=True)
+    price_bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(String, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     role = Column(String, default="user")
+    # Bumped whenever the claims baked into issued tokens (the role) change
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -43,4 +74,33 @@ class User(Base):
         "Product",
         secondary=user_favorite_products,
         back_populates="favorited_by"
-    )
\ No newline at end of file
+    )
+
+
+# Full-text search support: pg_trgm on PostgreSQL, an FTS5 trigram table on SQLite
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+SQLITE_PRODUCT_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products', content_rowid='rowid', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+]
+
+for statement in SQLITE_PRODUCT_FTS:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
@@ -1,35 +1,36 @@
-from fastapi import FastAPI
-from app.db.base import engine, SessionLocal
+from fastapi import FastAPI, Request, Response
+from app.db.base import engine, replicas, SessionLocal
 from app.db.models import Base, Product, User
 from app.api import api_router
-from sqlalchemy.orm import Session
+from app.api.utils.facets import product_facets_missing, rebuild_product_facets
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from app.core.exceptions import (app_exception_handler, sqlalchemy_exception_handler, validation_exception_handler, AppException, custom_exception_handler)
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from app.core.config import limiter
 from fastapi_pagination import  add_pagination
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async, hash_executor
 import os
+import asyncio
+from app.core.cache import listen_for_invalidations
+from app.core.images import image_executor, image_files
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from app.core.middleware import log_requests
+from app.core.profiling import profile_requests
+from app.core.rate_limit import add_rate_limit_headers
+from app.core.metrics import check_metrics_token, render_metrics
 
 
-Base.metadata.create_all(bind=engine)
 app = FastAPI()
 app.include_router(api_router)
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 app.add_exception_handler(AppException, app_exception_handler)
 app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, custom_exception_handler)
 
-app.mount("/images", StaticFiles(directory="uploads/images"), name="images")
+app.mount("/images", image_files, name="images")
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,35 +38,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["RateLimit-Policy", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After"],
 )
 
+app.middleware("http")(add_rate_limit_headers)
+app.middleware("http")(profile_requests)
+# Registered last so it is the outermost middleware and times CORS handling too
+app.middleware("http")(log_requests)
+
 add_pagination(app)
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    check_metrics_token(request)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.on_event("startup")
 async def startup_event():
     print("Starting application...")
-    db: Session = SessionLocal()
+    app.state.cache_listener = asyncio.create_task(listen_for_invalidations())
+    app.state.replica_monitor = asyncio.create_task(replicas.monitor()) if replicas.engines else None
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    db: AsyncSession = SessionLocal()
     try:
         # Create admin user if not exists
         admin_username = os.getenv("ADMIN_USERNAME", "admin")
         admin_password = os.getenv("ADMIN_PASSWORD", "changeme")  # Default password should be changed on first login
         
-        admin_user = db.query(User).filter(User.username == admin_username).first()
+        result = await db.execute(select(User).where(User.username == admin_username))
+        admin_user = result.scalars().first()
         if not admin_user:
             print("Creating admin user...")
             admin_user = User(
                 id=str(uuid.uuid4()),
                 username=admin_username,
-                hashed_password=get_password_hash(admin_password),
+                hashed_password=await get_password_hash_async(admin_password),
                 role="admin"
             )
             db.add(admin_user)
-            db.commit()
+            await db.commit()
             print("Admin user created successfully")
         
         # Seed products data
-        if not db.query(Product).first():
+        result = await db.execute(select(Product).limit(1))
+        if not result.scalars().first():
             print("Seeding Products Data...")
             sample_products = [
                 Product(
@@ -77,18 +98,31 @@ async def startup_event():
                 )
                 for i in range(10)
             ]
-            db.bulk_save_objects(sample_products)
-            db.commit()
+            db.add_all(sample_products)
+            await db.commit()
             print("Products seeded successfully")
+
+        # The facet table starts empty when it was just created next to existing products
+        if await product_facets_missing(db):
+            print("Building product facets...")
+            await rebuild_product_facets(db)
+            await db.commit()
     
     except Exception as e:
         print(f"Error during startup: {str(e)}")
     finally:
-        db.close()
+        await db.close()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down application...")
+    app.state.cache_listener.cancel()
+    if app.state.replica_monitor:
+        app.state.replica_monitor.cancel()
+    hash_executor.shutdown(wait=False)
+    image_executor.shutdown(wait=False)
+    await engine.dispose()
+    await replicas.dispose()
     
 
 from scalar_fastapi import get_scalar_api_reference
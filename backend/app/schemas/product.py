@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, validator,HttpUrl
 from decimal import Decimal
-from typing import Optional
+from typing import Optional, List, Any
 
 class ProductBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -20,6 +20,7 @@ class ProductUpdate(ProductBase):
     pass
 
 class ProductResponse(ProductBase):
+    thumbnail_url: Optional[str] = None
     id: str
 
     class Config:
@@ -29,4 +30,48 @@ class ProductWithFavoriteResponse(ProductResponse):
     is_favorite: bool = False
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProductCursorPage(BaseModel):
+    items: List[ProductWithFavoriteResponse]
+    size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class ProductBatchUpdate(ProductUpdate):
+    id: str
+
+
+class ProductBatchError(BaseModel):
+    index: int
+    id: Optional[str] = None
+    detail: Any
+
+
+class ProductBatchResult(BaseModel):
+    succeeded: List[str]
+    errors: List[ProductBatchError]
+
+
+class ProductImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ProductBatchError]
+
+
+class CategoryFacet(BaseModel):
+    category: str
+    count: int
+
+
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    price_histogram: List[PriceBucket]
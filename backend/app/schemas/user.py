@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Literal
 
 class UserCreate(BaseModel):
     username: str
@@ -10,4 +11,12 @@ class UserLogin(BaseModel):
 
 class Token(BaseModel):
     access_token: str
-    role: str
\ No newline at end of file
+    role: str
+
+class Principal(BaseModel):
+    id: str
+    username: str
+    role: str
+
+class RoleUpdate(BaseModel):
+    role: Literal["user", "admin"]
\ No newline at end of file
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float) -> Dict:
+    return {
+        "scenario": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round((len(latencies) + errors) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_load(
+    name: str,
+    request: Callable[[int], Awaitable[httpx.Response]],
+    total: int,
+    concurrency: int,
+    expected_status: tuple = (200,),
+) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await request(i)
+                ok = response.status_code in expected_status
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, latencies, errors, time.perf_counter() - start)
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> Dict[str, str]:
+    response = await client.post("/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="changeme")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--label", default="", help="Tag stored with the results, e.g. a commit sha")
+    return parser
+
+
+def emit(results: List[Dict], label: str = "", **metadata):
+    print(json.dumps({"label": label, **metadata, "results": results}, indent=2))
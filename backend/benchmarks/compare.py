@@ -0,0 +1,59 @@
+import argparse
+import json
+
+METRICS = ("rps", "ops_per_s", "p50_ms", "p95_ms", "p99_ms", "p50_us", "p95_us", "p99_us")
+# Higher is better for throughput, lower for latency
+THROUGHPUT = ("rps", "ops_per_s")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    return {result["scenario"]: result for result in report["results"]}
+
+
+def change(before: float, after: float) -> float | None:
+    return round((after - before) / before * 100, 1) if before else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON reports scenario by scenario")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10, help="Percent change flagged as a regression")
+    parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    rows = []
+    for scenario in before.keys() & after.keys():
+        for metric in METRICS:
+            if metric not in before[scenario] or metric not in after[scenario]:
+                continue
+            delta = change(before[scenario][metric], after[scenario][metric])
+            worse = delta is not None and (-delta if metric in THROUGHPUT else delta) > args.threshold
+            rows.append({
+                "scenario": scenario,
+                "metric": metric,
+                "before": before[scenario][metric],
+                "after": after[scenario][metric],
+                "change_pct": delta,
+                "regression": worse,
+            })
+    rows.sort(key=lambda row: (row["scenario"], METRICS.index(row["metric"])))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'scenario':<32} {'metric':<10} {'before':>12} {'after':>12} {'change':>9}")
+    for row in rows:
+        change_text = "n/a" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+        flag = "  <-- regression" if row["regression"] else ""
+        print(
+            f"{row['scenario']:<32} {row['metric']:<10} {row['before']:>12} {row['after']:>12} "
+            f"{change_text:>9}{flag}"
+        )
+
+
+if __name__ == "__main__":
+    main()
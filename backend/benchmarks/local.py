@@ -0,0 +1,50 @@
+"""Run the API against SQLite and an in-process fake Redis.
+
+Used by benchmarks.suite, which starts it as a subprocess so the server does
+not share an event loop with the load generator:
+
+    python -m benchmarks.local --port 8765 --database-url sqlite:////tmp/bench.db
+"""
+import argparse
+import os
+import sys
+import types
+
+
+def install_fake_redis():
+    """Make `import aioredis` resolve to fakeredis, shared by every client in the process."""
+    import fakeredis
+    from fakeredis import aioredis as fake_aioredis
+
+    server = fakeredis.FakeServer()
+    module = types.ModuleType("aioredis")
+    module.from_url = lambda url, **kwargs: fake_aioredis.FakeRedis(server=server, **kwargs)
+    sys.modules["aioredis"] = module
+
+
+def configure(database_url: str):
+    # Settings and the engine are built from the environment at import time
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+    install_fake_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API on SQLite with a fake Redis")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", required=True)
+    args = parser.parse_args()
+
+    configure(args.database_url)
+    import logging
+    import uvicorn
+    from app.main import app
+
+    # Per-request log lines would dominate the measurements
+    logging.getLogger("app.core.middleware").setLevel(logging.WARNING)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
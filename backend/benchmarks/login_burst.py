@@ -0,0 +1,34 @@
+import asyncio
+
+import httpx
+
+from benchmarks.common import base_parser, emit, login, run_load
+
+
+async def main():
+    parser = base_parser("GET /products/ latency with and without a concurrent login burst")
+    parser.add_argument("--logins", type=int, default=200, help="Logins in the burst")
+    parser.add_argument("--login-concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + args.login_concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        headers = await login(client, args.username, args.password)
+        credentials = {"username": args.username, "password": args.password}
+
+        async def list_products(i: int) -> httpx.Response:
+            return await client.get("/products/", params={"page": 1, "size": 10}, headers=headers)
+
+        async def login_request(i: int) -> httpx.Response:
+            return await client.post("/auth/login", json=credentials)
+
+        baseline = await run_load("get_products", list_products, args.requests, args.concurrency)
+        during_burst, burst = await asyncio.gather(
+            run_load("get_products_during_login_burst", list_products, args.requests, args.concurrency),
+            run_load("login_burst", login_request, args.logins, args.login_concurrency),
+        )
+    emit([baseline, during_burst, burst], args.label)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import emit
+
+CATEGORIES = ["Electronics", "Books", "Clothing", "Home", "Toys", "Sports", "Garden", "Beauty"]
+WORDS = ["wireless", "smart", "classic", "compact", "premium", "portable", "organic", "vintage", "ultra", "mini"]
+NOUNS = ["headphones", "lamp", "jacket", "blender", "novel", "backpack", "watch", "kettle", "chair", "speaker"]
+
+FILTERS = {
+    "none": {},
+    "name": {"name": "smart lamp"},
+    "category": {"category": "Books"},
+    "min_price": {"min_price": 500},
+    "price_range": {"min_price": 100, "max_price": 150},
+    "category_min_price": {"category": "Books", "min_price": 900},
+    "category_price_range": {"category": "Books", "min_price": 100, "max_price": 150},
+    "name_category_price_range": {"name": "lamp", "category": "Home", "min_price": 100, "max_price": 500},
+    "search": {"search": "portable speaker"},
+    "search_typo": {"search": "portabel"},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Product filter query time and plan benchmark")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCHMARK_DATABASE_URL", "sqlite:///benchmarks.db"),
+        help="Dedicated database to seed; never point this at production",
+    )
+    parser.add_argument("--products", type=int, default=100_000, help="Catalog size to seed")
+    parser.add_argument("--size", type=int, default=10, help="Page size")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", choices=sorted(FILTERS), help="Filter combinations to run")
+    parser.add_argument("--label", default="", help="Tag stored with the results, e.g. a commit sha")
+    return parser.parse_args()
+
+
+async def seed(engine, Product, count: int):
+    from sqlalchemy import func, insert, select
+
+    async with engine.begin() as conn:
+        existing = (await conn.execute(select(func.count()).select_from(Product))).scalar_one()
+        now = datetime.utcnow()
+        for start in range(existing, count, 5000):
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "name": f"{random.choice(WORDS)} {random.choice(NOUNS)} {i}",
+                    "description": f"{random.choice(WORDS)} {random.choice(NOUNS)} for everyday use",
+                    "price": round(random.uniform(1, 1000), 2),
+                    "category": random.choice(CATEGORIES),
+                    "created_at": now - timedelta(seconds=i),
+                    "updated_at": now,
+                }
+                for i in range(start, min(start + 5000, count))
+            ]
+            await conn.execute(insert(Product), rows)
+        if engine.dialect.name == "postgresql":
+            await conn.exec_driver_sql("ANALYZE products")
+        else:
+            await conn.exec_driver_sql("ANALYZE")
+
+
+async def explain(conn, query) -> str:
+    sql = str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = (await conn.exec_driver_sql(prefix + sql)).all()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+async def timed(conn, query, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        (await conn.execute(query)).all()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+async def main():
+    args = parse_args()
+    # app.db.base builds its engine from DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    from sqlalchemy import func, select
+    from app.db.base import Base, engine
+    from app.db.models import Product
+    from app.api.utils.utils import build_product_query
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(engine, Product, args.products)
+
+    results = []
+    async with engine.connect() as conn:
+        for name, filters in FILTERS.items():
+            if args.only and name not in args.only:
+                continue
+            query = build_product_query(**filters)
+            page_query = query.limit(args.size)
+            count_query = select(func.count()).select_from(query.order_by(None).subquery())
+            results.append({
+                "scenario": name,
+                "filters": filters,
+                "page_ms": await timed(conn, page_query, args.repeat),
+                "count_ms": await timed(conn, count_query, args.repeat),
+                "page_plan": await explain(conn, page_query),
+                "count_plan": await explain(conn, count_query),
+            })
+    await engine.dispose()
+    emit(results, args.label)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
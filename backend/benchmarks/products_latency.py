@@ -0,0 +1,50 @@
+import asyncio
+import random
+
+import httpx
+
+from benchmarks.common import base_parser, emit, login, run_load
+
+
+async def main():
+    parser = base_parser("Concurrent GET /products/ latency benchmark")
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument(
+        "--bust-cache",
+        action="store_true",
+        help="Vary min_price per request so every call reaches the database",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Send If-None-Match with the page ETag so every call takes the 304 path",
+    )
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        headers = await login(client, args.username, args.password)
+        etags = {}
+        if args.revalidate:
+            for page in range(1, args.pages + 1):
+                response = await client.get("/products/", params={"page": page, "size": args.size}, headers=headers)
+                etags[page] = response.headers["ETag"]
+
+        async def request(i: int) -> httpx.Response:
+            params = {"page": random.randint(1, args.pages), "size": args.size}
+            if args.bust_cache:
+                params["min_price"] = f"0.{i:06d}1"
+            if args.revalidate:
+                return await client.get(
+                    "/products/", params=params, headers={**headers, "If-None-Match": etags[params["page"]]}
+                )
+            return await client.get("/products/", params=params, headers=headers)
+
+        expected_status = (304,) if args.revalidate else (200,)
+        result = await run_load("get_products", request, args.requests, args.concurrency, expected_status)
+    emit([result], args.label)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
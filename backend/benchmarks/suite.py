@@ -0,0 +1,347 @@
+"""Self-contained load test and micro-benchmark suite.
+
+Seeds a fresh SQLite catalog, starts the API with an in-process fake Redis
+(benchmarks.local) in a subprocess, drives the HTTP scenarios against it and
+then times hot helpers in-process. Nothing outside the work directory is used.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+
+from benchmarks.common import emit, percentile, run_load
+from benchmarks.local import configure
+from benchmarks.product_filters import CATEGORIES, seed
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PASSWORD = "benchmark"
+
+HTTP_SCENARIOS = (
+    "products", "products_cold", "favorites_list", "favorites_toggle",
+    "login", "batch_create", "batch_update", "image_upload",
+)
+MICRO_SCENARIOS = (
+    "build_product_query", "page_json", "product_rows_json", "page_parse_raw", "favorite_overlay", "current_principal",
+)
+
+# Filter mix for the product list scenarios
+PRODUCT_FILTERS = [
+    {},
+    {},
+    {"category": "Books"},
+    {"category": "Home", "min_price": 100, "max_price": 500},
+    {"min_price": 100, "max_price": 150},
+    {"name": "lamp"},
+    {"search": "portable speaker"},
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seeded load test and micro-benchmarks on SQLite + fake Redis")
+    parser.add_argument("--products", type=int, default=10_000, help="Catalog size to seed")
+    parser.add_argument("--users", type=int, default=50, help="Regular users to seed")
+    parser.add_argument("--favorites-per-user", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per read scenario")
+    parser.add_argument("--write-requests", type=int, default=100, help="Requests per write scenario")
+    parser.add_argument("--logins", type=int, default=50, help="Requests in the login scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="Pages the product list scenarios spread over")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--micro-number", type=int, default=200, help="Calls per micro-benchmark sample")
+    parser.add_argument("--micro-repeat", type=int, default=50, help="Samples per micro-benchmark")
+    parser.add_argument("--only", nargs="*", choices=HTTP_SCENARIOS + MICRO_SCENARIOS, help="Scenarios to run")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, for repeatable request mixes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workdir", help="Where the database and uploads go; defaults to a temporary directory")
+    parser.add_argument("--label", default="", help="Tag stored with the results, e.g. a commit sha")
+    return parser.parse_args()
+
+
+async def seed_catalog(args) -> Dict:
+    """Create the schema, products, users and favorites; return ids and ready-made tokens."""
+    from sqlalchemy import insert, select
+    from app.core.security import create_access_token, get_password_hash
+    from app.db.base import Base, engine
+    from app.db.models import Product, User, user_favorite_products
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(engine, Product, args.products)
+
+    # One bcrypt hash shared by every account keeps seeding fast
+    hashed_password = get_password_hash(PASSWORD)
+    users = [{"id": str(uuid.uuid4()), "username": "admin", "role": "admin"}]
+    users += [{"id": str(uuid.uuid4()), "username": f"user{i}", "role": "user"} for i in range(args.users)]
+    async with engine.begin() as conn:
+        product_ids = (await conn.execute(select(Product.id))).scalars().all()
+        await conn.execute(insert(User), [{**user, "hashed_password": hashed_password} for user in users])
+        favorites = [
+            {"user_id": user["id"], "product_id": product_id}
+            for user in users[1:]
+            for product_id in rng.sample(product_ids, min(args.favorites_per_user, len(product_ids)))
+        ]
+        if favorites:
+            await conn.execute(insert(user_favorite_products), favorites)
+    await engine.dispose()
+
+    def headers(user):
+        token = create_access_token({"sub": user["username"], "uid": user["id"], "role": user["role"], "tv": "0"})
+        return {"Authorization": f"Bearer {token}"}
+
+    return {
+        "product_ids": product_ids,
+        "admin": headers(users[0]),
+        "users": [(user["username"], headers(user)) for user in users[1:]],
+    }
+
+
+def make_images(count: int) -> List[bytes]:
+    from PIL import Image
+
+    images = []
+    for i in range(count):
+        # Distinct content per upload, so content addressing does not dedupe them
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 800), (i % 256, (i // 256) % 256, 128)).save(buffer, "JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def product_payload(rng: random.Random, name: str) -> Dict:
+    return {
+        "name": name,
+        "description": "benchmark product",
+        "price": round(rng.uniform(1, 1000), 2),
+        "category": rng.choice(CATEGORIES),
+    }
+
+
+async def run_http_scenarios(args, data: Dict, selected: Callable[[str], bool]) -> List[Dict]:
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    product_ids, admin, users = data["product_ids"], data["admin"], data["users"]
+    images = make_images(args.write_requests) if selected("image_upload") else []
+    scenarios = []
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=120) as client:
+
+        async def products(i: int) -> httpx.Response:
+            params = {**rng.choice(PRODUCT_FILTERS), "page": rng.randint(1, args.pages), "size": 10}
+            return await client.get("/products/", params=params, headers=rng.choice(users)[1])
+
+        async def products_cold(i: int) -> httpx.Response:
+            # A unique, harmless min_price per call makes every cache key new
+            params = {**rng.choice(PRODUCT_FILTERS), "page": rng.randint(1, args.pages), "size": 10}
+            params["min_price"] = f"{params.get('min_price', 0)}.{i:07d}1"
+            return await client.get("/products/", params=params, headers=rng.choice(users)[1])
+
+        async def favorites_list(i: int) -> httpx.Response:
+            return await client.get("/products/favorites", headers=rng.choice(users)[1])
+
+        async def favorites_toggle(i: int) -> httpx.Response:
+            method = client.post if i % 2 == 0 else client.delete
+            return await method(f"/products/{rng.choice(product_ids)}/favorite", headers=rng.choice(users)[1])
+
+        async def login(i: int) -> httpx.Response:
+            return await client.post("/auth/login", json={"username": rng.choice(users)[0], "password": PASSWORD})
+
+        async def batch_create(i: int) -> httpx.Response:
+            items = [product_payload(rng, f"bench {run_id} {i} {j}") for j in range(args.batch_size)]
+            return await client.post("/products/batch", json=items, headers=admin)
+
+        async def batch_update(i: int) -> httpx.Response:
+            ids = rng.sample(product_ids, min(args.batch_size, len(product_ids)))
+            items = [{**product_payload(rng, f"bench {run_id} update {i} {j}"), "id": id} for j, id in enumerate(ids)]
+            return await client.put("/products/batch", json=items, headers=admin)
+
+        async def image_upload(i: int) -> httpx.Response:
+            files = {"file": (f"bench-{i}.jpg", images[i], "image/jpeg")}
+            return await client.post(f"/products/{rng.choice(product_ids)}/upload-image", files=files, headers=admin)
+
+        plan = [
+            ("products", products, args.requests),
+            ("products_cold", products_cold, args.requests),
+            ("favorites_list", favorites_list, args.requests),
+            ("favorites_toggle", favorites_toggle, args.write_requests),
+            ("login", login, args.logins),
+            ("batch_create", batch_create, args.write_requests),
+            ("batch_update", batch_update, args.write_requests),
+            ("image_upload", image_upload, args.write_requests),
+        ]
+        for name, request, total in plan:
+            if selected(name):
+                scenarios.append(await run_load(name, request, total, args.concurrency))
+    return scenarios
+
+
+def micro(name: str, func: Callable, number: int, repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return micro_summary(name, samples, number * repeat)
+
+
+async def amicro(name: str, func: Callable, number: int, repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        samples.append((time.perf_counter() - start) / number)
+    return micro_summary(name, samples, number * repeat)
+
+
+def micro_summary(name: str, samples: List[float], calls: int) -> Dict:
+    # Each sample is the mean of `number` calls, so percentiles describe sample-to-sample spread
+    return {
+        "scenario": f"micro:{name}",
+        "calls": calls,
+        "ops_per_s": round(1 / statistics.fmean(samples), 1),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 3),
+        "p50_us": round(percentile(samples, 50) * 1e6, 3),
+        "p95_us": round(percentile(samples, 95) * 1e6, 3),
+        "p99_us": round(percentile(samples, 99) * 1e6, 3),
+    }
+
+
+async def run_micro_benchmarks(args, data: Dict, selected: Callable[[str], bool]) -> List[Dict]:
+    from decimal import Decimal
+    from fastapi.security import HTTPAuthorizationCredentials
+    from fastapi_pagination import Page
+    from app.api.utils.pagination import PRODUCT_LIST_COLUMNS, serialize_product_page
+    from app.api.utils.utils import apply_favorite_flags, build_product_query, get_current_principal, get_page_product_ids
+    from app.db.base import SessionLocal
+    from app.schemas.product import ProductWithFavoriteResponse
+
+    number, repeat = args.micro_number, args.micro_repeat
+    results = []
+    if selected("build_product_query"):
+        filters = {"name": "lamp", "category": "Home", "min_price": 100, "max_price": 500, "search": "portable"}
+        results.append(micro("build_product_query", lambda: build_product_query(**filters), number, repeat))
+
+    page_type = Page[ProductWithFavoriteResponse]
+    items = [
+        ProductWithFavoriteResponse(
+            id=str(uuid.uuid4()), name=f"Product {i}", description="Sample product description",
+            price=Decimal("100.00") + i, category="Electronics", image_url=f"/images/{i}.jpg",
+        )
+        for i in range(10)
+    ]
+    page = page_type(items=items, total=args.products, page=1, size=10, pages=args.products // 10)
+    page_json = page.json()
+    if selected("page_json"):
+        results.append(micro("page_json", page.json, number, repeat))
+    if selected("product_rows_json"):
+        # The list endpoint's path: plain rows of the projected columns, encoded with orjson
+        fields = list(PRODUCT_LIST_COLUMNS)
+        rows = [tuple(getattr(item, field) for field in fields) + (item.id,) for item in items]
+        results.append(micro(
+            "product_rows_json",
+            lambda: serialize_product_page(rows, fields, args.products, 1, 10),
+            number, repeat,
+        ))
+    if selected("page_parse_raw"):
+        results.append(micro("page_parse_raw", lambda: page_type.parse_raw(page_json), number, repeat))
+    if selected("favorite_overlay"):
+        favorite_ids = set(get_page_product_ids(page_json)[::3])
+        results.append(micro(
+            "favorite_overlay",
+            lambda: apply_favorite_flags(page_json, favorite_ids.intersection(get_page_product_ids(page_json))),
+            number, repeat,
+        ))
+    if selected("current_principal"):
+        # Per-request auth: decode the token and compare its version with the cached one
+        scheme, token = data["admin"]["Authorization"].split(" ", 1)
+        credentials = HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+        async with SessionLocal() as db:
+            await get_current_principal(credentials, db)  # fills the token version cache
+            results.append(await amicro(
+                "current_principal", lambda: get_current_principal(credentials, db), number, repeat
+            ))
+    return results
+
+
+async def wait_for_server(port: int, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Benchmark server exited with status {process.returncode}")
+            try:
+                if (await client.get("/openapi.json")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Benchmark server did not start in time")
+
+
+async def main():
+    args = parse_args()
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="products-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    database = workdir / "bench.db"
+    database.unlink(missing_ok=True)
+    database_url = f"sqlite:///{database}"
+    configure(database_url)
+
+    def selected(name: str) -> bool:
+        return not args.only or name in args.only
+
+    started = time.perf_counter()
+    data = await seed_catalog(args)
+    seed_seconds = time.perf_counter() - started
+
+    results = []
+    if any(selected(name) for name in HTTP_SCENARIOS):
+        log = open(workdir / "server.log", "w")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.local", "--port", str(args.port), "--database-url", database_url],
+            cwd=workdir,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(BACKEND_DIR), os.getenv("PYTHONPATH")]))},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            await wait_for_server(args.port, process)
+            results += await run_http_scenarios(args, data, selected)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            log.close()
+
+    # In-process, after the server is gone, so the two do not compete for CPU
+    results += await run_micro_benchmarks(args, data, selected)
+
+    emit(results, args.label, config={
+        "products": args.products,
+        "users": args.users,
+        "favorites_per_user": args.favorites_per_user,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+        "seed": args.seed,
+        "seed_s": round(seed_seconds, 3),
+        "python": sys.version.split()[0],
+        "workdir": str(workdir),
+    })
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
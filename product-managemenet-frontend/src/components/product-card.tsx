@@ -39,6 +39,7 @@ interface ProductCardProps {
   name: string;
   price: string;
   image_url?: string; // New prop for image URL
+  thumbnail_url?: string | null;
   refetch: () => void;
 }
 const baseURL = import.meta.env.VITE_API_URL || "http://localhost:8000";
@@ -51,6 +52,7 @@ export function ProductCard({
   name,
   price,
   image_url,
+  thumbnail_url,
   refetch,
 }: ProductCardProps) {
   const [favorite, setFavorite] = useState(is_favorite);
@@ -133,7 +135,7 @@ export function ProductCard({
       <CardContent>
         {image_url && (
           <img
-            src={`${baseURL}${image_url}`}
+            src={`${baseURL}${thumbnail_url ?? image_url}`}
             alt={`${name} image`}
             className="w-full h-48 object-cover rounded-md"
             loading="lazy"
@@ -11,6 +11,7 @@ export interface Product {
   id: string;
   is_favorite: boolean;
   image_url?: string | null
+  thumbnail_url?: string | null
 }
 
 export interface PaginatedProductData {
@@ -20,6 +21,13 @@ export interface PaginatedProductData {
   size: number;
   pages: number;
 }
+
+export interface CursorProductData {
+  items: Product[];
+  size: number;
+  next_cursor: string | null;
+  prev_cursor: string | null;
+}
 export interface addProductPayload {
   name: string;
   category: string;
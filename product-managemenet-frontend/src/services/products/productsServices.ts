@@ -2,6 +2,7 @@ import { axiosInstance } from "@/lib/axios";
 import {
   addProductPayload,
   AxiosError,
+  CursorProductData,
   PaginatedProductData,
   Product,
   ResponseDetail,
@@ -121,10 +122,13 @@ export const addFavoriteService = async (
   }
 };
 
-export const getFavoriteProductsService = async (): Promise<[Product]> => {
+export const getFavoriteProductsService = async (
+  cursor?: string
+): Promise<CursorProductData> => {
   try {
-    const { data } = await axiosInstance.get<[Product]>(
-      `/products/favorites`
+    const { data } = await axiosInstance.get<CursorProductData>(
+      `/products/favorites`,
+      { params: { cursor } }
     );
     return data;
   } catch (error: unknown) {
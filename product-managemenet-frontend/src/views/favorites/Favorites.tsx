@@ -1,14 +1,24 @@
-import { useQuery } from "react-query";
+import { useInfiniteQuery } from "react-query";
 import { getFavoriteProductsService } from "@/services/products/productsServices";
-import { Product } from "@/lib/types";
+import { CursorProductData } from "@/lib/types";
 
 const baseURL = import.meta.env.VITE_API_URL;
 
 function Favorites() {
-  const { data, isLoading, isError, error } = useQuery<Product[], Error>(
+  const {
+    data: pages,
+    isLoading,
+    isError,
+    error,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery<CursorProductData, Error>(
     "favoriteProducts",
-    getFavoriteProductsService
+    ({ pageParam }) => getFavoriteProductsService(pageParam),
+    { getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined }
   );
+  const data = pages?.pages.flatMap((page) => page.items);
 
   if (isLoading) {
     return (
@@ -74,6 +84,17 @@ function Favorites() {
             </div>
           ))}
         </div>
+        {hasNextPage && (
+          <div className="flex justify-center mt-8">
+            <button
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+              className="bg-blue-500 text-white text-sm font-medium px-4 py-2 rounded shadow hover:bg-blue-600 transition disabled:opacity-50"
+            >
+              {isFetchingNextPage ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
         {data?.length === 0 && (
           <div className="text-center text-gray-600">
             No products in favorites.